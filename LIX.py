@@ -9,43 +9,88 @@ def LIX(filename):
     -------
     int
         LIX score, rounded.
-        
+
     Function
     -------
-    Calculates LIX score for text.  
-    https://en.wikipedia.org/wiki/Lix_(readability_test)        
-    
+    Calculates LIX score for text.
+    https://en.wikipedia.org/wiki/Lix_(readability_test)
+
     @AUTHOR: Aleksandra Kaszowska, 02/10/2023
+
+    version update from 17/10/2026:
+        - words and sentences are counted with shared tokenizer (tokenizer.py), as in analyze_text_FLEXIKON.
+          Sentences end at . ! ? and empty lines (no longer at / and |), empty sentences are not counted,
+          and punctuation is not counted in word length.
+        - file is read in chunks (LIX_stream()), so texts of any size can be scored.
+    """
+
+    from tokenizer import read_chunks
+
+    return LIX_stream(read_chunks(filename))
+
+
+def LIX_stream(chunks):
+    """
+    Parameters
+    ----------
+    chunks : iterable of str
+        consecutive parts of one text: open file, sys.stdin, list or generator of strings
+
+    Returns
+    -------
+    int
+        LIX score, rounded.
+
+    Function
+    -------
+    Calculates LIX score for text given in parts, keeping only running counts in memory.
+
+    Examples
+    --------
+    with open("corpus.txt", encoding="utf-8") as file_object:
+        LIX_stream(file_object)
+    """
+
+    sentenceCounter, sentenceLenCounter, wordsLongerThanSix = lix_counts(chunks)
+
+    return round(lix_score(sentenceCounter, sentenceLenCounter, wordsLongerThanSix))
+
+
+def lix_counts(chunks):
     """
-        
-    import re
-    
-    with open(filename,'r', encoding='utf-8') as file_object:
-        contents = file_object.read()
-    
-    sentenceList = re.split("[//.|//!|//?]", contents)
+    Parameters
+    ----------
+    chunks : iterable of str
+        consecutive parts of one text
+
+    Returns
+    -------
+    tuple of int
+        number of sentences, number of words, number of words longer than 6 characters
+    """
+
+    from tokenizer import tokenize_stream
+
     sentenceCounter = 0
     sentenceLenCounter = 0
     wordsLongerThanSix = 0
 
-    for eachSentence in sentenceList:
-        if eachSentence == '':
-            pass
-        else:
-            sentenceCounter += 1
-            noPunctuation = re.sub("-|,|;|:|(|)]",'',eachSentence)
-            words = re.split(' ', noPunctuation)
-            for eachWord in words:
-                if eachWord == '':
-                    pass
-                else: 
-                    sentenceLenCounter += 1
-                    if len(eachWord) > 6:
-                        wordsLongerThanSix += 1
-                
-                #print(f"number of sentences: {sentenceCounter}")
-                #print(f"number of words: {sentenceLenCounter}")
-                #print(f"number of words longer than 6 characters: {wordsLongerThanSix}")
+    for eachWord, sentence, _, _ in tokenize_stream(chunks):
+        sentenceCounter = sentence + 1
+        sentenceLenCounter += 1
+        if len(eachWord) > 6:
+            wordsLongerThanSix += 1
+
+    return sentenceCounter, sentenceLenCounter, wordsLongerThanSix
+
+
+def lix_score(sentenceCounter, sentenceLenCounter, wordsLongerThanSix):
+    """
+    Returns
+    -------
+    float
+        LIX score (not rounded): average sentence length + percentage of words longer than 6 characters
+    """
 
     averageSentenceLen = sentenceLenCounter / sentenceCounter
     #print(f"average sentence length: {averageSentenceLen}")
@@ -53,8 +98,182 @@ def LIX(filename):
     wordsLongerProp = wordsLongerThanSix / sentenceLenCounter * 100
     #print(f"proportion of long words: {wordsLongerProp}")
 
-    LIX = averageSentenceLen + wordsLongerProp
-    #print(f"LIX score for the passage: {round(LIX)}")
-    
-    return round(LIX)
+    return averageSentenceLen + wordsLongerProp
+
+
+def lix_details(filename, window=None, step=None):
+    """
+    Parameters
+    ----------
+    filename : str ('filename.txt')
+        .txt file containing text to analyze
+    window : int, optional
+        number of words in each window for windowed LIX (e.g. 500); no windows if None
+    step : int, optional
+        number of words between starts of consecutive windows; defaults to window (windows do not overlap)
+
+    Returns
+    -------
+    dict
+        'text_file', 'sentences', 'words', 'long_words', 'lix' (not rounded; None for text without words)
+        'windows': list of dict with 'first_word', 'last_word' (word numbers, from 1), 
+                   'sentences', 'words', 'long_words', 'lix'
+
+    Function
+    -------
+    Calculates LIX score of the whole text and of word windows in a single pass over the file.
+    A window counts every sentence it contains at least one word of. Texts shorter than 
+    one window get one window with all their words.
+    """
+
+    from collections import deque
+    from tokenizer import read_chunks, tokenize_stream
+
+    if window is not None and step is None:
+        step = window
+
+    sentenceCounter = 0
+    sentenceLenCounter = 0
+    wordsLongerThanSix = 0
+
+    windows = []
+    windowWords = deque()
+    windowSentences = {}
+    windowLong = 0
+
+    for eachWord, sentence, _, _ in tokenize_stream(read_chunks(filename)):
+        isLong = len(eachWord) > 6
+        sentenceCounter = sentence + 1
+        sentenceLenCounter += 1
+        wordsLongerThanSix += isLong
+
+        if window is None:
+            continue
+
+        windowWords.append((sentence, isLong))
+        windowSentences[sentence] = windowSentences.get(sentence, 0) + 1
+        windowLong += isLong
+
+        if len(windowWords) > window:
+            oldSentence, oldLong = windowWords.popleft()
+            windowLong -= oldLong
+            windowSentences[oldSentence] -= 1
+            if windowSentences[oldSentence] == 0:
+                del windowSentences[oldSentence]
+
+        if len(windowWords) == window and (sentenceLenCounter - window) % step == 0:
+            windows.append(_window_record(sentenceLenCounter, windowSentences, window, windowLong))
+
+    if window is not None and len(windows) == 0 and sentenceLenCounter > 0:
+        windows.append(_window_record(sentenceLenCounter, windowSentences, len(windowWords), windowLong))
+
+    lix = lix_score(sentenceCounter, sentenceLenCounter, wordsLongerThanSix) if sentenceLenCounter > 0 else None
+
+    return {'text_file': filename,
+            'sentences': sentenceCounter,
+            'words': sentenceLenCounter,
+            'long_words': wordsLongerThanSix,
+            'lix': lix,
+            'windows': windows}
+
+
+def _window_record(lastWord, windowSentences, windowLen, windowLong):
+
+    return {'first_word': lastWord - windowLen + 1,
+            'last_word': lastWord,
+            'sentences': len(windowSentences),
+            'words': windowLen,
+            'long_words': windowLong,
+            'lix': lix_score(len(windowSentences), windowLen, windowLong)}
+
+
+def _report_details(text_file, window=None, step=None):
+    """
+    lix_details() of text with status 'ok'; a text that cannot be scored (e.g. unreadable or 
+    not UTF-8) is reported and gets its error as status, so the remaining texts are still scored.
+    """
+
+    from analyze_texts_batch import _error_record
+
+    try:
+        details = lix_details(text_file, window=window, step=step)
+        details['status'] = 'ok'
+    except Exception as error:
+        details = dict(_error_record(text_file, error), sentences=None, words=None,
+                       long_words=None, lix=None, windows=[])
+
+    return details
+
+
+def LIX_report(texts, report_file='LIX_report.txt', window=None, step=None, workers=1):
+    """
+    Parameters
+    ----------
+    texts : str or list of str
+        folder with .txt files, glob pattern (e.g. 'stimuli/*.txt'), or list of text files
+    report_file : str, optional
+        tab separated report: one row per text with sentences, words, long_words, lix (not rounded)
+        and status ('ok', or error of a text that could not be scored)
+    window : int, optional
+        also write windowed LIX (see lix_details()) to {report_file without .txt}_windows.txt
+    step : int, optional
+        number of words between starts of consecutive windows; defaults to window
+    workers : int, optional
+        number of processes scoring texts in parallel
+
+    Returns
+    -------
+    report file(s)
+    list of dict
+        lix_details() of every text with added 'status', in order of texts
+
+    Examples
+    --------
+    LIX_report("stimuli/", "stimuli_LIX.txt", window=500, workers=8)
+    """
+
+    import csv
+    import functools
+    import multiprocessing
+    from analyze_texts_batch import find_text_files
+
+    textFiles = find_text_files(texts, exclude=[report_file, f'{report_file[:-4]}_windows.txt'])
+    score = functools.partial(_report_details, window=window, step=step)
+
+    if workers > 1 and len(textFiles) > 1:
+        with multiprocessing.Pool(min(workers, len(textFiles))) as pool:
+            details = pool.map(score, textFiles, chunksize=1)
+    else:
+        details = [score(text_file) for text_file in textFiles]
+
+    columns = ['text_file','sentences','words','long_words','lix','status']
+    with open(report_file, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file, delimiter='\t', lineterminator='\n')
+        writer.writerow(columns)
+        for textDetails in details:
+            writer.writerow([textDetails[column] for column in columns])
+
+    if window is not None:
+        windowColumns = ['first_word','last_word','sentences','words','long_words','lix']
+        with open(f'{report_file[:-4]}_windows.txt', 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file, delimiter='\t', lineterminator='\n')
+            writer.writerow(['text_file'] + windowColumns)
+            for textDetails in details:
+                for windowDetails in textDetails['windows']:
+                    writer.writerow([textDetails['text_file']] + [windowDetails[column] for column in windowColumns])
+
+    return details
+
+
+if __name__ == '__main__':
+
+    import sys
+
+    # python LIX.py filename.txt, or python LIX.py - to read text from standard input
+    if len(sys.argv) != 2:
+        sys.exit('usage: python LIX.py filename.txt (or - for standard input)')
 
+    if sys.argv[1] == '-':
+        print(LIX_stream(sys.stdin))
+    else:
+        print(LIX(sys.argv[1]))
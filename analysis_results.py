@@ -0,0 +1,89 @@
+'''
+Result builder shared by analyze_text_FLEXIKON and analyze_text_NLP.
+
+Identified rows and missing words are collected in plain lists while a text is
+analyzed, and turned into a dataframe only once, when output files are written.
+Growing a dataframe row by row copies the whole frame on every append.
+'''
+
+identifiedColumns = ['lemma','conjugation','part_of_speech','relative_frequency']
+
+
+def new_results():
+    """
+    Returns
+    -------
+    dict
+        'rows': list of (lemma, conjugation, part_of_speech, relative_frequency) rows
+        'frames': list of dataframes with the same columns, added after rows
+        'missing': dict used as ordered set of missing words
+    """
+
+    return {'rows': [], 'frames': [], 'missing': {}}
+
+
+def add_rows(results, rows):
+    results['rows'].extend(rows)
+
+
+def add_frame(results, frame):
+    results['frames'].append(frame)
+
+
+def add_missing(results, word):
+    results['missing'][word] = None
+
+
+def results_frame(results):
+    """
+    Returns
+    -------
+    dataframe of identified words (columns lemma, conjugation, part_of_speech, relative_frequency),
+    duplicated rows removed
+    """
+
+    import pandas as pd
+
+    frames = [frame for frame in results['frames'] if len(frame) != 0]
+    if len(results['rows']) != 0 or len(frames) == 0:
+        frames.insert(0, pd.DataFrame(results['rows'], columns=identifiedColumns))
+
+    final = pd.concat(frames, ignore_index=True, sort=False)
+
+    return final.drop_duplicates()
+
+
+def write_results(results, textname, version):
+    """
+    Parameters
+    ----------
+    results : dict
+        results from new_results(), filled during analysis
+    textname : str
+        text file name without extension
+    version : str
+        'FLEXIKON' or 'NLP'
+
+    Returns
+    -------
+    {textname}_identifiedWords_{version}.txt and {textname}_missingWords_{version}.txt files.
+    Missing words are written in order of first appearance.
+    dict
+        'identified_file', 'missing_file': output file names
+        'identified_rows', 'missing_words': number of rows/words written
+    """
+
+    identifiedFile = f'{textname}_identifiedWords_{version}.txt'
+    missingFile = f'{textname}_missingWords_{version}.txt'
+
+    final = results_frame(results)
+    final.to_csv(identifiedFile, sep='\t', encoding='utf-8', index=False)
+
+    with open(missingFile, 'w') as file:
+        for word in results['missing']:
+            file.write(f'{word}\n')
+
+    return {'identified_file': identifiedFile,
+            'missing_file': missingFile,
+            'identified_rows': len(final),
+            'missing_words': len(results['missing'])}
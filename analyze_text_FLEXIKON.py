@@ -1,4 +1,4 @@
-def analyze_text_FLEXIKON(text_file,flexikon_rows_file,corpus_file):
+def analyze_text_FLEXIKON(text_file,flexikon_rows_file,corpus_file,lexicon_index=None,mode='lookup',incremental=False):
     """
     Parameters
     ----------
@@ -10,11 +10,26 @@ def analyze_text_FLEXIKON(text_file,flexikon_rows_file,corpus_file):
     corpus_file : str: 'filename.txt'
         Corpus file containing lemmas and their relative frequency.
         https://korpus.dsl.dk/resources/details/freq-lemmas.html
+    lexicon_index : dict, optional
+        Index built with lexicon_index.build_lexicon_index() from the same reference files.
+        Pass it when analyzing several texts, so reference files are read only once.
+        A compiled lexicon (compiled_lexicon.open_lexicon()) can be used in lookup mode.
+    mode : str: 'lookup' or 'merge', optional
+        'lookup' (default) resolves words one by one through the dictionary index.
+        'merge' resolves all words of the text at once with dataframe merges, 
+        which is faster for long texts. Both modes produce identical output files.
+        Incremental runs resolve words in lookup mode: mode='merge' with incremental=True is a ValueError.
+    incremental : bool, optional
+        keep results of every sentence in {textname}_sentences_FLEXIKON.pkl, and on the next 
+        run analyze only sentences that changed (incremental_analysis.py). Output files are 
+        the same as without incremental. Reference files are loaded only if a sentence changed.
 
     Returns
     -------
     .csv file containing all words from text identified in flexikon, with relative frequencies from corpus
     .csv file containing all words from text missing from flexikon and corpus
+    dict
+        output file names and number of identified rows/missing words (see analysis_results.write_results())
     
     Function
     -------
@@ -25,166 +40,236 @@ def analyze_text_FLEXIKON(text_file,flexikon_rows_file,corpus_file):
     --------
     analyze_text_FLEXIKON("SAMPLE_TEXT.txt", "flexikon_rows.txt", "lemma-30k-2017.txt")
     
+    index = build_lexicon_index("flexikon_rows.txt", "lemma-30k-2017.txt")
+    analyze_text_FLEXIKON("SAMPLE_TEXT.txt", "flexikon_rows.txt", "lemma-30k-2017.txt", lexicon_index=index)
+    
+    analyze_text_FLEXIKON("LONG_TEXT.txt", "flexikon_rows.txt", "lemma-30k-2017.txt", mode='merge')
+    
     @AUTHOR: Aleksandra Kaszowska, 14/01/2024
     
     version update from 05/10/2023: 
         - fixed how punctuation is removed from words to allow for multiple paragraphs in target text file.
+    
+    version update from 17/10/2026:
+        - words are matched through dictionary index of flexikon and corpus (lexicon_index.py), 
+          instead of scanning full flexikon and corpus tables for every word.
+        - words are separated with shared tokenizer (tokenizer.py), also used by LIX and annotation GUIs.
+        - resolved words are cached across texts analyzed with the same lexicon_index 
+          (lexicon_index.resolve_word()); summary file reports cache hits and misses.
+        - incremental re-analysis of edited texts (incremental=True).
     """
     
-    import pandas as pd
-    import re 
     from datetime import datetime
+    from tokenizer import words
+    from lexicon_index import build_lexicon_index
+    from analysis_results import new_results, write_results
+    
+    if mode not in ('lookup', 'merge'):
+        raise ValueError(f"mode must be 'lookup' or 'merge', not {mode!r}")
+    if incremental and mode == 'merge':
+        raise ValueError("incremental=True resolves changed sentences in lookup mode; use mode='lookup'")
         
     # %%% set up references: corpus and flexikon
     
-    corpus = pd.read_csv(
-        corpus_file, 
-        sep='\t', 
-        header=None, 
-        names=['part_of_speech_tag','lemma','relative_frequency']
-        )
-    
-    corpusRecodeDict = {'A':'ADJECTIVE',
-                      'C':'CONJUNCTION',
-                      'D':'ADVERB',
-                      'I':'INTERJECTION',
-                      'L':'NUMERAL',
-                      'NC':'NOUN',
-                      'NP':'PROPER_NOUN',
-                      'P':'PRONOUN',
-                      'T':'PREPOSITION',
-                      'V':'VERB',
-                      'U':'UNIQUE',
-                      'NW':'POW_NOUN',
-                      'LW':'POW_NUMERAL',
-                      'M':'POW_MORPH_ITEM',
-                      'EW':'POW_LEX_ITEM',
-                      'AW':'NO_IDEA',
-                      'DW':'NO_IDEA',
-                      'TW':'NO_IDEA',
-                      'PW':'NO_IDEA',
-                      'IW':'NO_IDEA',
-                      'VW':'NO_IDEA'}  
-    
-    corpus = corpus.assign(part_of_speech = corpus.part_of_speech_tag.map(corpusRecodeDict))
-    
-    ###
-    
-    flexikon = pd.read_csv(
-        flexikon_rows_file, 
-        sep='\t', 
-        header=None, 
-        names=['part_of_speech_tag','lemma','conjugation']
-        )
-    
-    flexikonRecodeDict = {'S':'NOUN',
-                        'A':'ADJECTIVE',
-                        'V':'VERB',
-                        'D':'ADVERB',
-                        'F':'ABBREVIATION',
-                        'K':'CONJUNCTION',
-                        'L':'ONOMATOPEIC_WORD',
-                        'O':'PRONOUN',
-                        'P':'PROPER_NOUN',
-                        'I':'PREFIX',
-                        'Æ':'PREPOSITION',
-                        'T':'NUMERAL',
-                        'U':'INTERJECTION',
-                        'X':'UNIDENTIFIED'}  
-    
-    flexikon = flexikon.assign(part_of_speech = flexikon.part_of_speech_tag.map(flexikonRecodeDict))
-    
-    
-    # %%% separate textfile words using regex
+    if lexicon_index is None and not incremental:
+        lexicon_index = build_lexicon_index(flexikon_rows_file, corpus_file)
+    
+    if mode == 'merge' and lexicon_index is not None and 'flexikon' not in lexicon_index:
+        raise ValueError("mode='merge' needs flexikon and corpus tables; use build_lexicon_index(), not a compiled lexicon")
+    
+    
+    # %%% separate textfile words (tokenizer.py)
     
     with open(text_file,'r', encoding='utf-8') as file_object:
         contents = file_object.read()
     
-    sentenceList = re.split("[//.|//!|//?|\n|\r]", contents) # separate into sentences on> . ! ?
-    wordList = list()
-    
-    for eachSentence in sentenceList:
-        if eachSentence == '':
-            pass
-        else: 
-            noPunctuation = re.sub(r'[^\w\s]','',eachSentence) # remove punctuation from individual words
-            words = re.split(' ', noPunctuation)
-            for eachWord in words:
-                if eachWord == '':
-                    pass
-                else: 
-                    wordList.append(eachWord.lower())
+    wordList = words(contents)
             
-    # %%% try and match conjugated words from text with all options in flexikon, create two dataframes (missing and identified)
-    
-    identified = pd.DataFrame(columns=['part_of_speech_tag','lemma','conjugation','part_of_speech'])
-    corpusOnly = pd.DataFrame(columns=['part_of_speech_tag','lemma','relative_frequency','part_of_speech'])
-    
-    missingWords = set()
-    identifiedWords = []
-    corpusOnlyWords = []
-    
-    for word in wordList:
-        a = flexikon.loc[flexikon['conjugation'] == word]
-        c = corpus.loc[corpus['lemma'] == word.capitalize()]
-        d = corpus.loc[corpus['lemma'] == word]
-        if len(a) == 0 and len(c) == 0 and len(d) == 0:
-            missingWords.add(word)
-        elif len(a) == 0 and len(c) != 0 and len(d) == 0:
-            corpusOnly = pd.concat([corpusOnly, c], ignore_index=True, sort=False)
-            corpusOnlyWords.append(word)
-        elif len(a) == 0 and len(c) == 0 and len(d) != 0:
-            corpusOnly = pd.concat([corpusOnly, d], ignore_index=True, sort=False)
-            corpusOnlyWords.append(word)
-        else:
-            identified = pd.concat([identified, a], ignore_index=True, sort=False)
-            identifiedWords.append(word)
-    
-    # %%% match identified words with relative frequencies from corpus; 
-    # provide dataframe of all possible lemma/word/part of speech identifications
+    # %%% match words with flexikon and corpus
     
     storyname = text_file[:-4]        
 
-    identified = identified.drop('part_of_speech_tag', axis=1)
-    corpusOnly = corpusOnly.drop('part_of_speech_tag', axis=1)
-    
-    corpusOnly.insert(1, 'conjugation', corpusOnly['lemma']) # for words directly from corpus, lemma = conjugation
-    corpusOnly['conjugation'] = corpusOnly['conjugation'].apply(lambda x: x.lower() if isinstance(x, str) else x)
-
-    final = pd.DataFrame(columns=['lemma','conjugation','part_of_speech','relative_frequency'])
-    
-    identified = identified.drop('part_of_speech', axis=1)
-    
-    x = identified.merge(corpus, on=['lemma'])
-    x = x.drop_duplicates()
-    x = x.drop('part_of_speech_tag',axis=1)
-    
-    for word in identifiedWords:
-        b = x.loc[x['conjugation'] == word]
-        if len(b) != 0:
-            final = pd.concat([final,b], ignore_index=True, sort=False)
-        else:
-            missingWords.add(word)
-
+    results = new_results()
     
-    final = pd.concat([final,corpusOnly], ignore_index=True, sort=False)     
-    final = final.drop_duplicates()
+    if incremental:
+        cacheStats = None
+        sentenceStats = _match_sentences(contents, storyname, flexikon_rows_file, corpus_file, lexicon_index, results)
+    elif mode == 'merge':
+        _match_words_merge(wordList, lexicon_index, results)
+        cacheStats = None
+    else:
+        cacheStats = _match_words_lookup(wordList, lexicon_index, results)
         
-    final.to_csv(f'{storyname}_identifiedWords_FLEXIKON.txt', sep='\t', encoding='utf-8', index=False)  
-    
-    with open(f'{storyname}_missingWords_FLEXIKON.txt', 'w') as file:
-        for word in missingWords:
-            file.write(f'{word}\n')
+    written = write_results(results, storyname, 'FLEXIKON')
 
     # %%% create summary file
 
-    with open(f'{storyname}_analysis_summary_FLEXIKON.txt', 'w') as file:
+    summaryFile = f'{storyname}_analysis_summary_FLEXIKON.txt'
+    
+    with open(summaryFile, 'w') as file:
         file.write(f'original text analyzed: {text_file}\n')
         file.write(f'flexikon reference file: {flexikon_rows_file}\n')
         file.write(f'corpus reference file: {corpus_file}\n')
         file.write(f'output files: {storyname}_missingWords_FLEXIKON.txt, {storyname}_identifiedWords_FLEXIKON.txt\n')
         
+        if incremental:
+            file.write(f"incremental: {sentenceStats['analyzed']} of {sentenceStats['sentences']} sentences analyzed, "
+                       f"others reused from {sentenceStats['store_file']}\n")
+        
+        if cacheStats is not None:
+            cache = lexicon_index['word_cache']
+            file.write(f"word cache: {cacheStats['hits']} hits, {cacheStats['misses']} misses in this text; "
+                       f"{cache['hits']} hits, {cache['misses']} misses in session ({len(cache['entries'])} of {cache['maxsize']} words cached)\n")
+        
         now = datetime.now()
         format_date = now.strftime("%A, %B %d, %Y - %H:%M:%S")
         
-        file.write(f'analysis conducted on: {format_date}')     
\ No newline at end of file
+        file.write(f'analysis conducted on: {format_date}')
+    
+    return dict(written, text_file=text_file, summary_file=summaryFile)
+
+
+def _match_words_lookup(wordList, lexicon_index, results):
+    """
+    Match words from text with flexikon and corpus, one word at a time, through dictionary index.
+    Identified rows and missing words are added to results (analysis_results.new_results()).
+    Returns word cache hits and misses for this text (see lexicon_index.resolve_word()).
+    """
+    
+    from lexicon_index import resolve_word, new_word_cache
+    
+    cache = lexicon_index.setdefault('word_cache', new_word_cache())
+    hits, misses = cache['hits'], cache['misses']
+    
+    _add_resolved(((word,) + resolve_word(lexicon_index, word) for word in wordList), results)
+    
+    return {'hits': cache['hits'] - hits, 'misses': cache['misses'] - misses}
+
+
+def _add_resolved(resolvedWords, results):
+    """
+    Add (word, kind, rows) of every word of text, as resolved by lexicon_index.resolve_word(), 
+    to results: missing words, then identified rows in order of first appearance.
+    """
+    
+    from analysis_results import add_rows, add_missing
+    
+    # %%% try and match conjugated words from text with all options in flexikon, sort into missing, identified and corpus only words
+    
+    identifiedWords = {}
+    corpusOnlyWords = {}
+    
+    for word, kind, rows in resolvedWords:
+        if kind == 'missing':
+            add_missing(results, word)
+        elif kind == 'corpus':
+            corpusOnlyWords.setdefault(word, rows)
+        else:
+            identifiedWords.setdefault(word, rows)
+    
+    # %%% match identified words with relative frequencies from corpus; 
+    # provide all possible lemma/word/part of speech identifications
+    
+    for word, b in identifiedWords.items():
+        if len(b) != 0:
+            add_rows(results, b)
+        else:
+            add_missing(results, word)
+    
+    for rows in corpusOnlyWords.values():
+        add_rows(results, rows)
+
+
+def _match_sentences(contents, storyname, flexikon_rows_file, corpus_file, lexicon_index, results):
+    """
+    Incremental version of _match_words_lookup(): words of sentences already in the sentence 
+    store are taken from it, only words of new or edited sentences are resolved.
+    Returns number of sentences, number of sentences analyzed, and store file name.
+    """
+    
+    from lexicon_index import build_lexicon_index, resolve_word
+    from incremental_analysis import split_sentences, sentence_key, load_sentences, save_sentences
+    
+    storeFile = f'{storyname}_sentences_FLEXIKON.pkl'
+    referenceFiles = [flexikon_rows_file, corpus_file]
+    stored = load_sentences(storeFile, referenceFiles)
+    
+    sentences = {}
+    resolvedWords = []
+    analyzed = 0
+    
+    for _, sentenceWords in split_sentences(contents):
+        key = sentence_key(sentenceWords)
+        if key not in sentences:
+            if key in stored:
+                sentences[key] = stored[key]
+            else:
+                if lexicon_index is None:
+                    lexicon_index = build_lexicon_index(flexikon_rows_file, corpus_file)
+                sentences[key] = [(word,) + resolve_word(lexicon_index, word) for word in sentenceWords]
+                analyzed += 1
+        resolvedWords.extend(sentences[key])
+    
+    _add_resolved(resolvedWords, results)
+    save_sentences(storeFile, referenceFiles, sentences)
+    
+    return {'sentences': len(sentences), 'analyzed': analyzed, 'store_file': storeFile}
+
+
+def _match_words_merge(wordList, lexicon_index, results):
+    """
+    Match words from text with flexikon and corpus with dataframe merges, all words at once.
+    Produces the same rows, in the same order, as _match_words_lookup().
+    Row order of the reference files is kept through explicit row numbers, 
+    so it does not depend on how pandas orders merge results.
+    """
+    
+    import pandas as pd
+    from analysis_results import add_frame, add_missing
+    
+    flexikon = lexicon_index['flexikon']
+    corpus = lexicon_index['corpus']
+    flexikon = flexikon[['lemma','conjugation']].assign(flexikon_row = range(len(flexikon)))
+    corpus = corpus[['lemma','relative_frequency','part_of_speech']].assign(corpus_row = range(len(corpus)))
+    
+    # one row per distinct word, in order of first appearance in text
+    words = pd.DataFrame({'word': wordList}).drop_duplicates(ignore_index=True)
+    words['word_order'] = range(len(words))
+    words['capitalized'] = words['word'].str.capitalize()
+    
+    # %%% sort into missing, identified and corpus only words
+    
+    inFlexikon = words['word'].isin(flexikon['conjugation'])
+    capitalizedInCorpus = words['capitalized'].isin(corpus['lemma'])
+    lowercaseInCorpus = words['word'].isin(corpus['lemma'])
+    
+    missing = ~inFlexikon & ~capitalizedInCorpus & ~lowercaseInCorpus
+    capitalizedOnly = ~inFlexikon & capitalizedInCorpus & ~lowercaseInCorpus
+    lowercaseOnly = ~inFlexikon & ~capitalizedInCorpus & lowercaseInCorpus
+    identified = ~(missing | capitalizedOnly | lowercaseOnly)
+    
+    for word in words.loc[missing, 'word']:
+        add_missing(results, word)
+    
+    # %%% match identified words with relative frequencies from corpus
+    
+    x = words.loc[identified, ['word','word_order']].merge(flexikon, left_on='word', right_on='conjugation')
+    x = x.merge(corpus, on='lemma')
+    x = x.sort_values(['word_order','flexikon_row','corpus_row'], kind='stable')
+    
+    withFrequency = words.loc[identified, 'word'].isin(x['conjugation'])
+    for word in words.loc[identified, 'word'][~withFrequency]:
+        add_missing(results, word)
+    
+    add_frame(results, x[['lemma','conjugation','part_of_speech','relative_frequency']])
+    
+    # %%% words directly from corpus, lemma = conjugation
+    
+    corpusKeys = pd.concat([words.loc[capitalizedOnly, ['capitalized','word_order']].rename(columns={'capitalized': 'lemma'}),
+                            words.loc[lowercaseOnly, ['word','word_order']].rename(columns={'word': 'lemma'})])
+    
+    y = corpusKeys.merge(corpus, on='lemma')
+    y = y.sort_values(['word_order','corpus_row'], kind='stable')
+    y['conjugation'] = y['lemma'].map(lambda x: x.lower() if isinstance(x, str) else x)
+    
+    add_frame(results, y[['lemma','conjugation','part_of_speech','relative_frequency']])
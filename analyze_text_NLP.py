@@ -1,4 +1,31 @@
-def analyze_text_NLP(text_file,corpus_file):
+# components of da_core_news_md that do not affect part of speech and lemma tagging
+unusedComponents = ['parser', 'ner']
+
+_models = {}
+
+
+def load_nlp_model(model='da_core_news_md'):
+    """
+    Parameters
+    ----------
+    model : str, optional
+        name of spacy model
+
+    Returns
+    -------
+    spacy Language
+        model without parser and ner components. Model is loaded on first call 
+        and the same model is returned by every following call in the session.
+    """
+    
+    if model not in _models:
+        import spacy
+        _models[model] = spacy.load(model, exclude=unusedComponents)
+    
+    return _models[model]
+
+
+def analyze_text_NLP(text_file,corpus_file,nlp=None,corpus_index=None,split_paragraphs=False,batch_size=64,n_process=1,incremental=False):
     """
     Parameters
     ----------
@@ -7,11 +34,30 @@ def analyze_text_NLP(text_file,corpus_file):
     corpus_file : str: 'filename.txt'
         Corpus file containing lemmas and their relative frequency.
         https://korpus.dsl.dk/resources/details/freq-lemmas.html
+    nlp : spacy Language, optional
+        loaded da_core_news_md model; load_nlp_model() if not given.
+    corpus_index : dict, optional
+        corpus index from lexicon_index.build_corpus_index(corpus_file); built here if not given.
+        Pass corpus_index when analyzing several texts, so it is loaded only once.
+    split_paragraphs : bool, optional
+        tag paragraphs of text (separated by empty lines) as separate documents through nlp.pipe,
+        instead of tagging the whole text as one document. Useful for very long texts.
+    batch_size : int, optional
+        number of paragraphs tagged together by nlp.pipe (with split_paragraphs only).
+    n_process : int, optional
+        number of processes used by nlp.pipe (with split_paragraphs only).
+    incremental : bool, optional
+        tag sentences (tokenizer.py) as separate documents, keep tagged words of every sentence 
+        in {textname}_sentences_NLP.pkl, and on the next run tag only sentences that changed 
+        (incremental_analysis.py). As with split_paragraphs, tags can differ slightly from 
+        tagging the whole text at once. The spacy model is loaded only if a sentence changed.
 
     Returns
     -------
     .csv file containing all words from text identified by spacy, with relative frequencies from corpus
     .csv file containing all words from text not identified by spacy
+    dict
+        output file names and number of identified rows/missing words (see analysis_results.write_results())
     
     Function
     -------
@@ -19,62 +65,100 @@ def analyze_text_NLP(text_file,corpus_file):
     identify words in text and annotate them with relative frequencies from corpus.
     
     @AUTHOR: Aleksandra Kaszowska, 02/10/2023
-    """
-    
-    import pandas as pd
-    import spacy 
-    from datetime import datetime
     
-    nlp = spacy.load('da_core_news_md')
-    
-    textname = text_file[:-4]
+    version update from 17/10/2026:
+        - tagged words and identified rows are collected in lists and written once (analysis_results.py),
+          instead of growing dataframes one row at a time.
+        - spacy model is loaded once per session (load_nlp_model()), without parser and ner components,
+          which are not needed for part of speech and lemma tagging.
+        - incremental re-analysis of edited texts (incremental=True).
+    """
     
-    # %%% set up corpus reference
+    import re
     
-    corpus = pd.read_csv(
-        corpus_file, 
-        sep='\t', 
-        header=None, 
-        names=['part_of_speech_tag','lemma','relative_frequency']
-        )
-    
-    corpusRecodeDict = {'A':'ADJECTIVE',
-                      'C':'CONJUNCTION',
-                      'D':'ADVERB',
-                      'I':'INTERJECTION',
-                      'L':'NUMERAL',
-                      'NC':'NOUN',
-                      'NP':'PROPER_NOUN',
-                      'P':'PRONOUN',
-                      'T':'PREPOSITION',
-                      'V':'VERB',
-                      'U':'UNIQUE',
-                      'NW':'POW_NOUN',
-                      'LW':'POW_NUMERAL',
-                      'M':'POW_MORPH_ITEM',
-                      'EW':'POW_LEX_ITEM',
-                      'AW':'NO_IDEA',
-                      'DW':'NO_IDEA',
-                      'TW':'NO_IDEA',
-                      'PW':'NO_IDEA',
-                      'IW':'NO_IDEA',
-                      'VW':'NO_IDEA'}  
-    
-    corpus = corpus.assign(part_of_speech = corpus.part_of_speech_tag.map(corpusRecodeDict))
-    corpus = corpus.drop('part_of_speech_tag', axis=1)
+    if nlp is None and not incremental:
+        nlp = load_nlp_model()
         
     # %%% text file setup
     
     text = open(text_file, 'r', encoding='utf-8').read()
-    document = nlp(text)
     
-    # tag parts of speech
-    textTagged = pd.DataFrame(columns=['part_of_speech_tag','lemma','conjugation'])
+    if incremental:
+        return _analyze_sentences_NLP(text_file, corpus_file, text, nlp, corpus_index, batch_size)
+    
+    if split_paragraphs:
+        paragraphs = re.split(r'\n\s*\n', text)
+        documents = nlp.pipe(paragraphs, batch_size=batch_size, n_process=n_process)
+    else:
+        documents = [nlp(text)]
+    
+    return analyze_documents_NLP(text_file, corpus_file, documents, corpus_index)
+
+
+def _analyze_sentences_NLP(text_file, corpus_file, text, nlp, corpus_index, batch_size):
+    """
+    Incremental version of analyze_text_NLP(): tagged words of sentences already in the 
+    sentence store are taken from it, only new or edited sentences are tagged.
+    """
+    
+    from incremental_analysis import split_sentences, sentence_key, load_sentences, save_sentences
+    
+    storeFile = f'{text_file[:-4]}_sentences_NLP.pkl'
+    stored = load_sentences(storeFile, [corpus_file])
+    
+    keys = [(sentence_key(sentenceText), sentenceText) for sentenceText, _ in split_sentences(text)]
+    sentences = {key: stored[key] for key, _ in keys if key in stored}
+    changed = {key: sentenceText for key, sentenceText in keys if key not in sentences}
+    
+    if changed:
+        if nlp is None:
+            nlp = load_nlp_model()
+        documents = nlp.pipe(changed.values(), batch_size=batch_size)
+        for key, document in zip(changed, documents):
+            sentences[key] = _tag_words([document])
+    
+    textTagged = [tagged for key, _ in keys for tagged in sentences[key]]
+    save_sentences(storeFile, [corpus_file], sentences)
+    
+    written = _annotate_tagged(text_file, corpus_file, textTagged, corpus_index,
+                               f'incremental: {len(changed)} of {len(sentences)} sentences tagged, '
+                               f'others reused from {storeFile}\n')
+    
+    return written
+
+
+def analyze_documents_NLP(text_file,corpus_file,documents,corpus_index=None):
+    """
+    Parameters
+    ----------
+    text_file : str: 'filename.txt'
+        .txt file the documents were tagged from; used for output file names.
+    corpus_file : str: 'filename.txt'
+        Corpus file containing lemmas and their relative frequency.
+    documents : list of spacy Doc
+        text tagged by spacy, as one document or as consecutive parts of the text.
+    corpus_index : dict, optional
+        corpus index from lexicon_index.build_corpus_index(corpus_file); built here if not given.
+
+    Returns
+    -------
+    output files and dict, as analyze_text_NLP().
+    
+    Function
+    -------
+    Second part of analyze_text_NLP(): annotate words tagged by spacy with relative frequencies 
+    from corpus. Used directly when texts are tagged in batches with nlp.pipe.
+    """
+    
+    return _annotate_tagged(text_file, corpus_file, _tag_words(documents), corpus_index)
+
+
+def _tag_words(documents):
+    """
+    (lemma, word, part of speech) of every token of documents, in lowercase, 
+    without punctuation and spaces.
+    """
     
-    for token in document:
-        datarow = [token.pos_, token.lemma_.lower(), token.text.lower()]
-        textTagged.loc[len(textTagged)] = datarow
-        
     textTagRecodeDict = {'ADJ':'ADJECTIVE',
                           'ADP':'ADPOSITION',
                           'ADV':'ADVERB',
@@ -95,64 +179,75 @@ def analyze_text_NLP(text_file,corpus_file):
                           'X':'OTHER',
                           'SPACE':'SPACE'}
     
-    textTagged = textTagged.assign(part_of_speech = textTagged.part_of_speech_tag.map(textTagRecodeDict))
+    # tag parts of speech, drop punctuation and spaces
+    textTagged = []
     
-    # drop punctuation
-    textTagged = textTagged.drop(textTagged[textTagged['part_of_speech'] == 'PUNCTUATION'].index)
+    for token in (token for document in documents for token in document):
+        partOfSpeech = textTagRecodeDict.get(token.pos_)
+        if partOfSpeech not in ('PUNCTUATION', 'SPACE'):
+            textTagged.append((token.lemma_.lower(), token.text.lower(), partOfSpeech))
     
-    # drop spaces
-    textTagged = textTagged.drop(textTagged[textTagged['part_of_speech'] == 'SPACE'].index)
+    return textTagged
+
+
+def _annotate_tagged(text_file, corpus_file, textTagged, corpus_index=None, summary_note=''):
+    """
+    Match tagged words (_tag_words()) with corpus, write output and summary files.
+    """
     
-    # drop tag
-    textTagged = textTagged.drop('part_of_speech_tag', axis=1)
+    from datetime import datetime
+    from lexicon_index import build_corpus_index
+    from analysis_results import new_results, add_rows, add_missing, write_results
     
+    textname = text_file[:-4]
     
-    # %%% try and match identified lemmas with lemma30k, create two dataframes (missing lemmas and identified lemmas)
+    # %%% set up corpus reference
     
-    currentLemmas = textTagged['lemma'].tolist()
+    if corpus_index is None:
+        corpus_index = build_corpus_index(corpus_file)
     
-    identified = pd.DataFrame(columns=['lemma','relative_frequency','part_of_speech'])
+    # %%% try and match identified lemmas with lemma30k, sort into missing lemmas and identified lemmas
     
-    missingWords = set()
-    identifiedLemmas=[]
+    results = new_results()
+    identifiedLemmas = []
     
-    for lemma in currentLemmas:
-        a = corpus.loc[corpus['lemma'] == lemma]
-        if len(a) == 0:
-            missingWords.add(lemma)
+    for lemma, _, _ in textTagged:
+        if lemma not in corpus_index:
+            add_missing(results, lemma)
         else:
-            identified = pd.concat([identified, a], ignore_index=True, sort=False)
             identifiedLemmas.append(lemma)
     
     # %%% match identified words with relative frequencies; 
     # provide dataframe of all word identifications
-         
-    with open(f'{textname}_missingWords_NLP.txt', 'w') as file:
-        for word in missingWords:
-            file.write(f'{word}\n')
     
-    final = pd.DataFrame(columns=['lemma','conjugation','part_of_speech','relative_frequency'])
+    conjugations = {}
+    for lemma, conjugation, partOfSpeech in textTagged:
+        conjugations.setdefault((lemma, partOfSpeech), {})[conjugation] = None
     
-    x = identified.merge(textTagged, on = ['lemma','part_of_speech'])
-    x = x.drop_duplicates()
+    x = {}
+    for lemma in dict.fromkeys(identifiedLemmas):
+        for _, _, relativeFrequency, partOfSpeech in corpus_index[lemma]:
+            for conjugation in conjugations.get((lemma, partOfSpeech), {}):
+                x.setdefault(conjugation, []).append((lemma, conjugation, partOfSpeech, relativeFrequency))
     
-    identifiedWords = textTagged['conjugation'].tolist()
+    for _, conjugation, _ in textTagged:
+        add_rows(results, x.pop(conjugation, []))
     
-    for word in identifiedWords:
-        b = x.loc[x['conjugation'] == word]
-        final = pd.concat([final,b], ignore_index=True, sort=False)
-        
-    final = final.drop_duplicates()
-    final.to_csv(f'{textname}_identifiedWords_NLP.txt', sep='\t', encoding='utf-8', index=False)
+    written = write_results(results, textname, 'NLP')
     
     # %%%
-    with open(f'{textname}_analysis_summary_NLP.txt', 'w') as file:
+    summaryFile = f'{textname}_analysis_summary_NLP.txt'
+    
+    with open(summaryFile, 'w') as file:
         file.write(f'original text analyzed: {text_file}\n')
         file.write("reference model: spacy.load('da_core_news_md')\n")
         file.write(f'corpus reference file: {corpus_file}\n')
         file.write(f'output files: {textname}_missingWords_NLP.txt, {textname}_identifiedWords_NLP.txt\n')
+        file.write(summary_note)
             
         now = datetime.now()
         format_date = now.strftime("%A, %B %d, %Y - %H:%M:%S")
             
-        file.write(f'analysis conducted on: {format_date}')     
+        file.write(f'analysis conducted on: {format_date}')
+    
+    return dict(written, text_file=text_file, summary_file=summaryFile)
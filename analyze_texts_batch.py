@@ -0,0 +1,389 @@
+'''
+Batch analysis of many texts in one process.
+
+Reference files (and the spacy model for the NLP pipeline) are loaded once and
+used for every text. Each text gets the usual _identifiedWords_, _missingWords_
+and _analysis_summary_ files next to it, and one manifest file lists all texts
+analyzed in the run.
+
+Usage in IPython:
+from analyze_texts_batch import analyze_texts_FLEXIKON, analyze_texts_NLP
+analyze_texts_FLEXIKON('stimuli/', 'flexikon_rows.txt', 'lemma-30k-2017.txt')
+analyze_texts_NLP('stimuli/*.txt', 'lemma-30k-2017.txt')
+
+Usage from command line:
+python analyze_texts_batch.py FLEXIKON stimuli/ --flexikon flexikon_rows.txt --corpus lemma-30k-2017.txt --workers 16
+'''
+
+# files written next to every text by the pipelines and GUIs; skipped when a folder or pattern is analyzed
+outputMarkers = ('_identifiedWords_', '_missingWords_', '_analysis_summary_',
+                 '_pos_annotation_summary', '_output_summary', '_suggestions_')
+
+# default names of reports written into a folder of texts (batch manifest, LIX_report(), frequency_report());
+# files starting with them are skipped as well
+reportPrefixes = ('batch_manifest_', 'LIX_report', 'frequency_report')
+
+
+def find_text_files(texts, exclude=()):
+    """
+    Parameters
+    ----------
+    texts : str or list of str
+        folder with .txt files, glob pattern (e.g. 'stimuli/*.txt'), or list of text files
+    exclude : list of str, optional
+        files never returned as texts, e.g. the manifest or report being written
+
+    Returns
+    -------
+    list of text files, sorted by name (list of text files: in given order); 
+    output files of previous analyses and reports with default names are skipped
+    """
+
+    import os
+    import glob
+
+    excluded = {os.path.abspath(file) for file in exclude if file is not None}
+
+    if not isinstance(texts, str):
+        return [file for file in texts if os.path.abspath(file) not in excluded]
+
+    if os.path.isdir(texts):
+        textFiles = glob.glob(os.path.join(texts, '*.txt'))
+    else:
+        textFiles = glob.glob(texts)
+
+    textFiles = [file for file in textFiles
+                 if not any(marker in os.path.basename(file) for marker in outputMarkers)
+                 and not os.path.basename(file).startswith(reportPrefixes)
+                 and os.path.abspath(file) not in excluded]
+
+    return sorted(textFiles)
+
+
+def write_manifest(manifest_file, version, reference_files, records):
+    """
+    Parameters
+    ----------
+    manifest_file : str
+        name of manifest file to write
+    version : str
+        'FLEXIKON' or 'NLP'
+    reference_files : list of str
+        reference files used in the run
+    records : list of dict
+        one record per text, as returned by analyze_text_FLEXIKON() / analyze_text_NLP(),
+        with added 'status' and 'seconds'
+
+    Returns
+    -------
+    manifest file: run details, followed by tab separated table with one row per text
+    """
+
+    import pandas as pd
+    from datetime import datetime
+
+    columns = ['text_file','status','identified_rows','missing_words','seconds',
+               'identified_file','missing_file','summary_file']
+    table = pd.DataFrame(records, columns=columns)
+    table = table.astype({'identified_rows': 'Int64', 'missing_words': 'Int64'})
+
+    now = datetime.now()
+    format_date = now.strftime("%A, %B %d, %Y - %H:%M:%S")
+
+    with open(manifest_file, 'w', encoding='utf-8') as file:
+        file.write(f'pipeline: {version}\n')
+        file.write(f'reference files: {", ".join(reference_files)}\n')
+        file.write(f'texts analyzed: {(table["status"] == "ok").sum()} of {len(table)}\n')
+        file.write(f'analysis conducted on: {format_date}\n\n')
+        table.to_csv(file, sep='\t', index=False, lineterminator='\n')
+
+
+def _default_manifest(textFiles, version):
+
+    import os
+
+    if len(textFiles) == 0:
+        return f'batch_manifest_{version}.txt'
+
+    folder = os.path.commonpath([os.path.dirname(os.path.abspath(file)) for file in textFiles])
+
+    return os.path.join(folder, f'batch_manifest_{version}.txt')
+
+
+def _batch_files(texts, manifest_file, version):
+    """
+    Text files to analyze and manifest file to write; the manifest is not analyzed as a text.
+    """
+
+    textFiles = find_text_files(texts)
+    if manifest_file is None:
+        manifest_file = _default_manifest(textFiles, version)
+
+    return find_text_files(textFiles, exclude=[manifest_file]), manifest_file
+
+
+def _error_record(text_file, error):
+
+    print(f'{text_file}: {type(error).__name__}: {error}')
+
+    return {'text_file': text_file, 'status': f'error: {type(error).__name__}: {error}'}
+
+
+def _record(text_file, analyze):
+    """
+    Run analyze(), add status and run time to its record. A text that fails is reported 
+    and recorded in the manifest with its error, so the remaining texts are still analyzed.
+    """
+
+    import time
+
+    startTime = time.perf_counter()
+    try:
+        record = analyze()
+        record['status'] = 'ok'
+    except Exception as error:
+        record = _error_record(text_file, error)
+    record['seconds'] = round(time.perf_counter() - startTime, 3)
+
+    return record
+
+
+def _run_batch(textFiles, analyze):
+    """
+    Run analyze(text_file) for every text, one after another.
+    """
+
+    return [_record(text_file, lambda: analyze(text_file)) for text_file in textFiles]
+
+
+# reference data for worker processes; filled before workers are started, so that forked
+# workers share it with the main process instead of receiving a pickled copy per text
+_workerState = {}
+
+
+def _init_worker(flexikon_rows_file, corpus_file, mode, lexicon_file=None):
+    """
+    Prepare worker process. Forked workers already hold the lexicon index;
+    workers started without fork load it themselves (from reference_cache.py,
+    or by opening the compiled lexicon).
+    """
+
+    if 'index' not in _workerState:
+        _workerState['index'] = _load_index(flexikon_rows_file, corpus_file, lexicon_file)
+    _workerState['files'] = (flexikon_rows_file, corpus_file)
+    _workerState['mode'] = mode
+
+
+def _analyze_in_worker(text_file):
+
+    from analyze_text_FLEXIKON import analyze_text_FLEXIKON
+
+    flexikon_rows_file, corpus_file = _workerState['files']
+
+    return _run_batch([text_file], lambda text_file: analyze_text_FLEXIKON(
+        text_file, flexikon_rows_file, corpus_file,
+        lexicon_index=_workerState['index'], mode=_workerState['mode']))[0]
+
+
+def _load_index(flexikon_rows_file, corpus_file, lexicon_file=None):
+
+    if lexicon_file is not None:
+        from compiled_lexicon import open_lexicon
+        return open_lexicon(lexicon_file, flexikon_rows_file, corpus_file)
+
+    from lexicon_index import build_lexicon_index
+
+    return build_lexicon_index(flexikon_rows_file, corpus_file)
+
+
+def _run_parallel(textFiles, index, flexikon_rows_file, corpus_file, mode, workers, lexicon_file=None):
+    """
+    Analyze texts in a pool of worker processes. Records are returned in the order of
+    textFiles, whichever worker finishes first.
+    """
+
+    import multiprocessing
+
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+        _workerState['index'] = index
+    else:
+        context = multiprocessing.get_context()
+
+    try:
+        with context.Pool(workers, initializer=_init_worker,
+                          initargs=(flexikon_rows_file, corpus_file, mode, lexicon_file)) as pool:
+            records = list(pool.imap(_analyze_in_worker, textFiles, chunksize=1))
+    finally:
+        _workerState.clear()
+
+    return records
+
+
+def analyze_texts_FLEXIKON(texts,flexikon_rows_file,corpus_file,mode='lookup',manifest_file=None,workers=1,lexicon_file=None):
+    """
+    Parameters
+    ----------
+    texts : str or list of str
+        folder with .txt files, glob pattern (e.g. 'stimuli/*.txt'), or list of text files.
+    flexikon_rows_file : str: 'filename.txt'
+        Flexikon file formatted as rows using convert_flexikon().
+        https://korpus.dsl.dk/resources/details/flexikon.html
+    corpus_file : str: 'filename.txt'
+        Corpus file containing lemmas and their relative frequency.
+        https://korpus.dsl.dk/resources/details/freq-lemmas.html
+    mode : str: 'lookup' or 'merge', optional
+        see analyze_text_FLEXIKON().
+    manifest_file : str, optional
+        defaults to batch_manifest_FLEXIKON.txt in the folder containing the texts.
+    workers : int, optional
+        number of worker processes analyzing texts in parallel (default 1: no worker processes).
+        Workers share the flexikon/corpus index loaded by the main process where the system 
+        supports fork. Output files and manifest are the same for any number of workers.
+    lexicon_file : str, optional
+        compiled lexicon (compiled_lexicon.compile_lexicon()) of the same reference files, used 
+        instead of loading them: all workers read one shared copy of it. Lookup mode only
+        (ValueError with mode='merge', before any text is analyzed).
+        ValueError if it was compiled from other files, or the files changed since.
+
+    Returns
+    -------
+    output files of analyze_text_FLEXIKON() for every text, and manifest file.
+    list of dict
+        one record per text, as written to manifest file.
+
+    Function
+    -------
+    Runs analyze_text_FLEXIKON() on every text, with flexikon and corpus loaded only once.
+
+    Examples
+    --------
+    analyze_texts_FLEXIKON("stimuli/", "flexikon_rows.txt", "lemma-30k-2017.txt")
+    analyze_texts_FLEXIKON("stimuli/", "flexikon_rows.txt", "lemma-30k-2017.txt", workers=16)
+    """
+
+    from analyze_text_FLEXIKON import analyze_text_FLEXIKON
+
+    if lexicon_file is not None and mode == 'merge':
+        raise ValueError("mode='merge' needs flexikon and corpus tables; use reference files, not a compiled lexicon")
+
+    textFiles, manifest_file = _batch_files(texts, manifest_file, 'FLEXIKON')
+    index = _load_index(flexikon_rows_file, corpus_file, lexicon_file)
+
+    if workers > 1 and len(textFiles) > 1:
+        records = _run_parallel(textFiles, index, flexikon_rows_file, corpus_file, mode,
+                                min(workers, len(textFiles)), lexicon_file)
+    else:
+        records = _run_batch(textFiles, lambda text_file: analyze_text_FLEXIKON(
+            text_file, flexikon_rows_file, corpus_file, lexicon_index=index, mode=mode))
+
+    write_manifest(manifest_file, 'FLEXIKON', [flexikon_rows_file, corpus_file], records)
+
+    return records
+
+
+def _read_texts(textFiles, failed):
+    """
+    Yield (text, text_file) for every readable text; texts that cannot be read are 
+    added to failed {text_file: error} and skipped.
+    """
+
+    for text_file in textFiles:
+        try:
+            with open(text_file, 'r', encoding='utf-8') as file_object:
+                text = file_object.read()
+        except (OSError, UnicodeDecodeError) as error:
+            failed[text_file] = error
+            continue
+        yield text, text_file
+
+
+def analyze_texts_NLP(texts,corpus_file,manifest_file=None,batch_size=16,n_process=1,lexicon_file=None):
+    """
+    Parameters
+    ----------
+    texts : str or list of str
+        folder with .txt files, glob pattern (e.g. 'stimuli/*.txt'), or list of text files.
+    corpus_file : str: 'filename.txt'
+        Corpus file containing lemmas and their relative frequency.
+        https://korpus.dsl.dk/resources/details/freq-lemmas.html
+    manifest_file : str, optional
+        defaults to batch_manifest_NLP.txt in the folder containing the texts.
+    batch_size : int, optional
+        number of texts tagged together by nlp.pipe.
+    n_process : int, optional
+        number of processes used by nlp.pipe for tagging.
+    lexicon_file : str, optional
+        compiled lexicon (compiled_lexicon.compile_lexicon()) containing corpus_file, 
+        read instead of corpus_file. ValueError if it was compiled from another corpus file, 
+        or corpus_file changed since.
+
+    Returns
+    -------
+    output files of analyze_text_NLP() for every text, and manifest file.
+    list of dict
+        one record per text, as written to manifest file.
+
+    Function
+    -------
+    Tags all texts with spacy through nlp.pipe, and annotates them with relative frequencies 
+    from corpus as analyze_text_NLP(). Spacy model and corpus are loaded only once.
+
+    Examples
+    --------
+    analyze_texts_NLP("stimuli/*.txt", "lemma-30k-2017.txt")
+    analyze_texts_NLP("stimuli/*.txt", "lemma-30k-2017.txt", batch_size=32, n_process=4)
+    """
+
+    from lexicon_index import build_corpus_index
+    from analyze_text_NLP import load_nlp_model, analyze_documents_NLP
+
+    textFiles, manifest_file = _batch_files(texts, manifest_file, 'NLP')
+    nlp = load_nlp_model()
+    if lexicon_file is not None:
+        corpusIndex = _load_index(None, corpus_file, lexicon_file)['lemmas']
+    else:
+        corpusIndex = build_corpus_index(corpus_file)
+
+    failed = {}
+    documents = nlp.pipe(_read_texts(textFiles, failed), as_tuples=True,
+                         batch_size=batch_size, n_process=n_process)
+
+    records = {}
+    for document, text_file in documents:
+        records[text_file] = _record(text_file, lambda: analyze_documents_NLP(
+            text_file, corpus_file, [document], corpusIndex))
+    for text_file, error in failed.items():
+        records[text_file] = dict(_error_record(text_file, error), seconds=0.0)
+
+    records = [records[text_file] for text_file in textFiles]
+
+    write_manifest(manifest_file, 'NLP', ["spacy.load('da_core_news_md')", corpus_file], records)
+
+    return records
+
+
+if __name__ == '__main__':
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Analyze all texts in a folder or matching a pattern.')
+    parser.add_argument('version', choices=['FLEXIKON', 'NLP'])
+    parser.add_argument('texts', help="folder with .txt files, or pattern such as 'stimuli/*.txt'")
+    parser.add_argument('--flexikon', default='flexikon_rows.txt', help='flexikon rows file (FLEXIKON only)')
+    parser.add_argument('--corpus', default='lemma-30k-2017.txt', help='corpus file')
+    parser.add_argument('--mode', choices=['lookup', 'merge'], default='lookup', help='matching mode (FLEXIKON only)')
+    parser.add_argument('--workers', type=int, default=1, help='number of worker processes (FLEXIKON: texts, NLP: spacy tagging)')
+    parser.add_argument('--batch-size', type=int, default=16, help='number of texts tagged together by spacy (NLP only)')
+    parser.add_argument('--manifest', default=None, help='manifest file name')
+    parser.add_argument('--lexicon', default=None, help='compiled lexicon file, used instead of loading reference files')
+    args = parser.parse_args()
+
+    if args.version == 'FLEXIKON':
+        records = analyze_texts_FLEXIKON(args.texts, args.flexikon, args.corpus, mode=args.mode,
+                                         manifest_file=args.manifest, workers=args.workers, lexicon_file=args.lexicon)
+    else:
+        records = analyze_texts_NLP(args.texts, args.corpus, manifest_file=args.manifest,
+                                    batch_size=args.batch_size, n_process=args.workers, lexicon_file=args.lexicon)
+
+    print(f"{sum(record['status'] == 'ok' for record in records)} of {len(records)} texts analyzed")
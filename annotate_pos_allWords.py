@@ -16,8 +16,8 @@
     
 #     Please note that:
 #         In order to add highlighted choice and/or comments to output file, you MUST press "Add to Output"
-#         If you annotate the same word twice, BOTH versions will be added to output file. New annotation of already annotated word does not override previous annotation.
-#         If you do not highlight a choice (or there is no choice) and press "Add to Output", the output file will contain an empty line. 
+#         If you annotate the same word twice, the new annotation replaces the previous one in output file.
+#         If you do not highlight a choice (or there is no choice) and do not type a comment, "Add to Output" moves to next word without adding anything. 
         
 # Input files:
 #     text_file: original text  in .txt format without headers
@@ -28,6 +28,10 @@
 # Output files:
 #     output_file: {file_name}_{version}_output.csv
 #         output file with a list of all identified words, annotated for part of speech, with relative frequencies
+#     journal_file: {file_name}_{version}_allWords_journal.jsonl
+#         every decision, written as soon as it is made. If the GUI is closed or crashes, it reopens
+#         the text after the last annotated word, with previous decisions included in output. 
+#         Delete the journal file to start annotating the text from the beginning.
 #     summary_file: {file_name}_{version}_pos_annotation_summary.txt
 #         summary file with annotation details
     
@@ -41,32 +45,33 @@
 
 text_file = 'SAMPLE_TEXT.txt'
 version = 'FLEXIKON' # 'NLP' or 'FLEXIKON' depending on previous step
+window_sentences = None # None to display whole text; e.g. 30 to display 30 sentences around current word (long texts)
 
 # %%%
 
 file_name = text_file[:-4]
 identified_file = f'{file_name}_identifiedWords_{version}.txt'
 output_file = f'{file_name}_{version}_output.csv'
+journal_file = f'{file_name}_{version}_allWords_journal.jsonl'
 summary_file = f'{file_name}_{version}_pos_annotation_summary.txt'
 
 import tkinter as tk
 from tkinter import messagebox
 import csv
-import string
 from datetime import datetime
+from tokenizer import tokenize
+from annotation_view import new_view, show_token
+from annotation_journal import read_journal, open_journal, append_entry, resume_position, new_store, store_row, export_store
 
 # Read the text file
 with open(text_file, "r", encoding='utf-8') as f:
     content = f.read().strip()
-wordList = content.split()
-words = []
 
-for word in wordList:
-    for punctuation in string.punctuation:
-        word = word.replace(punctuation,'')
-    words.append(word.lower())
+# Split into words with shared tokenizer (same words as analyze_text_FLEXIKON)
+tokens = list(tokenize(content))
+words = [word for word, _, _, _ in tokens]
     
-words2 = [(word, idx) for idx, word in enumerate(content.split())]
+words2 = [(content[start:end], idx) for idx, (_, _, start, end) in enumerate(tokens)]
 
 # Read the identified words file
 word_data = {}
@@ -78,8 +83,16 @@ with open(identified_file, "r", encoding='utf-8') as f:
             word_data[word] = []
         word_data[word].append(row)
 
-selected_rows = []
-current_index = 0
+# Decisions of previous sessions are read back from journal, and annotation resumes after the last one
+journal_entries = read_journal(journal_file)
+# one output row per annotated word, keyed by word number; latest decision wins (annotation_journal.py)
+annotations = new_store(journal_entries)
+current_index = resume_position(journal_entries, len(words))
+journal = open_journal(journal_file)
+
+def record(row):
+    store_row(annotations, row)
+    append_entry(journal, {'position': current_index, 'row': row})
 
 def display_matches():
     word = words[current_index]
@@ -90,11 +103,7 @@ def display_matches():
                 
 def highlight_word():
     word, idx = words2[current_index]
-    text_label.tag_remove("highlight", "1.0", tk.END)
-    start_pos = sum(len(w) + 1 for w, _ in words2[:idx])
-    start_index = "1.0 + {}c".format(start_pos)
-    end_index = "1.0 + {}c".format(start_pos + len(word))
-    text_label.tag_add("highlight", start_index, end_index)        
+    show_token(view, idx)        
 
 def add_comment():
     comment = comment_text.get("1.0", tk.END).strip()  # Extract comment from Text widget
@@ -109,9 +118,9 @@ def add_comment():
         for item in selected_row.split(', '):
             row_data.append(item)
         row_data.append(comment)
-        selected_rows.append(row_data)
+        record(row_data)
     elif comment:
-        selected_rows.append([(current_index+1),"", words2[current_index][0], "", "", comment])
+        record([(current_index+1),"", words2[current_index][0], "", "", comment])
     move_word(1)
     
     comment_text.delete("1.0", tk.END)  # Clear the Text widget
@@ -128,21 +137,20 @@ def move_word(direction):
     display_matches()
 
 def save_to_file():
-    with open(output_file, "w", newline="") as f:
-        writer = csv.writer(f)
-        for row in selected_rows:
-            writer.writerow(row)
+    export_store(annotations, output_file)
     messagebox.showinfo("Success", f"Saved file as {file_name}_{version}_output.csv")
     
 root = tk.Tk()
 
 text_label = tk.Text(root, wrap=tk.WORD, height=15, bg="light gray", fg="black")
-text_label.insert(tk.END, content)
 text_label.config(state=tk.DISABLED, font=("Arial", 12))
 text_label.pack(pady=10)
 text_label.tag_configure("highlight", background="yellow")
 
-word_label = tk.Label(root, text=wordList[current_index], font=("Arial", 12, "bold"))
+# text is displayed whole, or window_sentences sentences at a time (annotation_view.py)
+view = new_view(text_label, content, tokens, window_sentences)
+
+word_label = tk.Label(root, text=words[current_index], font=("Arial", 12, "bold"))
 word_label.pack(pady=10)
 
 left_button = tk.Button(root, text="<", command=lambda: move_word(-1))
@@ -179,10 +187,14 @@ display_matches()
 
 root.mainloop()
 
+journal.close()
+
 # generate summary file
 with open(summary_file, 'w') as file:
     file.write(f'original text analyzed: {text_file}\n')
     file.write(f'output file: {file_name}_{version}_output.csv\n')
+    file.write(f'decisions journal: {journal_file}\n')
+    file.write(f'annotated words: {len(annotations)}\n')
         
     now = datetime.now()
     format_date = now.strftime("%A, %B %d, %Y - %H:%M:%S")
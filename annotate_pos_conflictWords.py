@@ -14,11 +14,17 @@
 #     Press "Save file" to save output file. 
 #     GUI allows annotation only of words that have none, or two or more options in corpus. 
 #     Words with one option in corpus are automatically added to output.
+#     Words with two or more options are resolved automatically, before annotation, where possible (auto_resolve.py):
+#         with part of speech from the NLP pipeline output of the same text, if it exists (use_nlp_tags),
+#         and with decisions made earlier for the same word in the same context (propagate).
+#         Each new decision is also applied to later occurrences of the word in the same context, which are then skipped.
+#         Changing the decision on a word changes its copies too (or removes them, if the new decision has no choice).
+#         Automatically resolved rows have 'auto: nlp' or 'auto: decision' as comment in output file.
     
 #     Please note that:
 #         In order to add highlighted choice and/or comments to output file, you MUST press "Add to Output"
-#         If you annotate the same word twice, BOTH versions will be added to output file. New annotation of already annotated word does not override previous annotation.
-#         If you do not highlight a choice (or there is no choice) and press "Add to Output", the output file will contain an empty line. 
+#         If you annotate the same word twice, the new annotation replaces the previous one in output file.
+#         If you do not highlight a choice (or there is no choice) and do not type a comment, "Add to Output" moves to next word without adding anything. 
         
 # Input files:
 #     text_file: original text  in .txt format without headers
@@ -29,6 +35,10 @@
 # Output files:
 #     output_file: {file_name}_{version}_output.csv
 #         output file with a list of all identified words, annotated for part of speech, with relative frequencies
+#     journal_file: {file_name}_{version}_conflictWords_journal.jsonl
+#         every decision, written as soon as it is made. If the GUI is closed or crashes, it reopens
+#         the text after the last annotated word, with previous decisions included in output. 
+#         Delete the journal file to start annotating the text from the beginning.
 #     summary_file: {file_name}_{version}_pos_annotation_summary.txt
 #         summary file with annotation details
     
@@ -42,27 +52,33 @@
 
 text_file = 'SAMPLE_TEXT.txt'
 version = 'FLEXIKON' # 'NLP' or 'FLEXIKON' depending on previous step
+window_sentences = None # None to display whole text; e.g. 30 to display 30 sentences around current word (long texts)
+use_nlp_tags = True # resolve conflict words with part of speech from NLP pipeline output of the same text, if available
+propagate = 'context' # reuse annotator decisions for the same word: 'context' (same previous and next word), 'form' (anywhere in text) or None
 
 file_name = text_file[:-4]
 identified_file = f'{file_name}_identifiedWords_{version}.txt'
 output_file = f'{file_name}_{version}_output.csv'
+journal_file = f'{file_name}_{version}_conflictWords_journal.jsonl'
+nlp_identified_file = f'{file_name}_identifiedWords_NLP.txt'
 summary_file = f'{file_name}_{version}_output_summary.txt'
 
 import tkinter as tk
 from tkinter import messagebox
 import csv
-import string
 from datetime import datetime
+from tokenizer import tokenize
+from annotation_view import new_view, show_token
+from annotation_journal import read_journal, open_journal, append_entry, append_entries, resume_position, new_store, store_row, export_store
+from auto_resolve import read_nlp_tags, journal_tokens, copy_sources, known_decisions, auto_resolve, queue_keys, propagate_decision
 
 # Read the text file
 with open(text_file, "r", encoding='utf-8') as f:
     display_content = f.read().strip()
-    content = display_content.lower()
-    for punctuation in string.punctuation:
-        content_punct = content.replace(punctuation,'')
 
-# Splitting while preserving order and position
-words = [(word, idx) for idx, word in enumerate(content_punct.split())]
+# Split into words with shared tokenizer (same words as analyze_text_FLEXIKON), preserving order and position
+tokens = list(tokenize(display_content))
+words = [(word, idx) for idx, (word, _, _, _) in enumerate(tokens)]
 
 # Read the identified words file
 word_data = {}
@@ -75,19 +91,82 @@ with open(identified_file, "r", encoding='utf-8') as f:
         word_data[word].append(row)
         
 # Process words
-selected_rows = []
+automatic_rows = []
 multi_choice_words = []
 multiList = []
 
 for word, idx in words:
     if word in word_data:
         if len(word_data[word]) == 1:
-            selected_rows.append([idx+1] + word_data[word][0])
+            automatic_rows.append([idx+1] + word_data[word][0])
         else:
             multi_choice_words.append((word, idx))
             multiList.append(word)
 
-current_index = 0
+# Decisions of previous sessions are read back from journal
+journal_entries = read_journal(journal_file)
+manual_entries = [entry for entry in journal_entries if not entry.get('auto')]
+
+# Resolve conflict words automatically where possible (auto_resolve.py): 
+# with NLP pipeline tags, and with annotator decisions from previous sessions.
+# Words already in journal are not resolved again; words annotated earlier stay in the queue.
+text_words = [word for word, _ in words]
+auto_rows, multi_choice_words, auto_counts, auto_sources = auto_resolve(
+    multi_choice_words, text_words, word_data,
+    nlp_tags=read_nlp_tags(nlp_identified_file) if use_nlp_tags else None,
+    decisions=known_decisions(manual_entries, text_words, propagate) if propagate else None,
+    propagate=propagate,
+    journaled=journal_tokens(journal_entries))
+print(f"{len(auto_rows)} conflict words resolved automatically ({auto_counts['nlp']} with NLP tags, "
+      f"{auto_counts['decision']} with previous decisions); {len(multi_choice_words)} left to annotate")
+
+# one output row per annotated word, keyed by word number; latest decision wins (annotation_journal.py)
+annotations = new_store(journal_entries, rows=automatic_rows + auto_rows)
+# annotation resumes after the last word annotated in previous sessions
+current_index = resume_position(manual_entries, len(multi_choice_words), tokens=[idx+1 for _, idx in multi_choice_words])
+journal = open_journal(journal_file)
+
+# rows resolved automatically are journaled, so they are not resolved (and counted) again in next sessions
+auto_entries = [{'position': None, 'row': row, 'auto': row[-1][len('auto: '):]} for row in auto_rows]
+for entry in auto_entries:
+    if entry['row'][0] in auto_sources:
+        entry['source'] = auto_sources[entry['row'][0]]
+append_entries(journal, auto_entries)
+
+# decisions are propagated to later words in the same context during the session; those words are skipped.
+# copied_from: {word number: number of the word whose decision was copied to it}
+queue_index = queue_keys(multi_choice_words, text_words, propagate)
+token_positions = {idx+1: position for position, (_, idx) in enumerate(multi_choice_words)}
+copied_from = copy_sources(journal_entries)
+copied_from.update(auto_sources)
+propagated = set()
+
+def copy_decision(token, row, position):
+    copy = [token] + list(row[1:5]) + ['auto: decision']
+    store_row(annotations, copy)
+    append_entry(journal, {'position': position, 'row': copy, 'auto': 'decision', 'source': int(row[0])})
+    copied_from[token] = int(row[0])
+    if position is not None:
+        propagated.add(position)
+
+def record(row):
+    token = int(row[0])
+    store_row(annotations, row)
+    append_entry(journal, {'position': current_index, 'row': row})
+    copied_from.pop(token, None)
+    # copies of an earlier decision on this word follow the new one, or are removed if it has no choice
+    for copy in [copy for copy, source in copied_from.items() if source == token]:
+        position = token_positions.get(copy)
+        if row[1] != '':
+            copy_decision(copy, row, position)
+        else:
+            annotations.pop(copy, None)
+            append_entry(journal, {'position': position, 'removed': copy, 'auto': 'decision', 'source': token})
+            del copied_from[copy]
+            propagated.discard(position)
+    for position, auto_row in propagate_decision(queue_index, current_index, text_words, row, propagate):
+        if auto_row[0] not in annotations:
+            copy_decision(auto_row[0], row, position)
 
 def display_matches():
     word, _ = multi_choice_words[current_index]
@@ -100,11 +179,7 @@ def display_matches():
 
 def highlight_word():
     word, idx = multi_choice_words[current_index]
-    text_label.tag_remove("highlight", "1.0", tk.END)
-    start_pos = sum(len(w) + 1 for w, _ in words[:idx])
-    start_index = "1.0 + {}c".format(start_pos)
-    end_index = "1.0 + {}c".format(start_pos + len(word))
-    text_label.tag_add("highlight", start_index, end_index)
+    show_token(view, idx)
 
 def add_comment():
     comment = comment_text.get("1.0", tk.END).strip()  # Extract comment from Text widget
@@ -117,9 +192,9 @@ def add_comment():
     if selected_row:
         row_data = selected_row.split(', ')
         row_data.append(comment)
-        selected_rows.append([idx+1] + row_data)
+        record([idx+1] + row_data)
     elif comment:
-        selected_rows.append([idx+1, "", "", "", "", comment])
+        record([idx+1, "", "", "", "", comment])
     move_word(1)
     
     comment_text.delete("1.0", tk.END)  # Clear the Text widget
@@ -127,6 +202,8 @@ def add_comment():
 def move_word(direction):
     global current_index
     current_index += direction
+    while direction > 0 and current_index in propagated:
+        current_index += 1
     if current_index < 0:
         current_index = 0
     elif current_index >= len(multi_choice_words):
@@ -136,20 +213,19 @@ def move_word(direction):
     display_matches()
 
 def save_to_file():
-    with open(f"{file_name}_{version}_output.csv", "w", newline="") as f:
-        writer = csv.writer(f)
-        for row in selected_rows:
-            writer.writerow(row)
+    export_store(annotations, output_file)
     messagebox.showinfo("Success", f"Saved file as {file_name}_{version}_output.csv")
 
 root = tk.Tk()
 
 text_label = tk.Text(root, wrap=tk.WORD, height=15, bg="light gray", fg="black")
-text_label.insert(tk.END, display_content)
 text_label.config(state=tk.DISABLED, font=("Arial", 12))
 text_label.pack(pady=10)
 text_label.tag_configure("highlight", background="yellow")
 
+# text is displayed whole, or window_sentences sentences at a time (annotation_view.py)
+view = new_view(text_label, display_content, tokens, window_sentences)
+
 word_label = tk.Label(root, text="", font=("Arial", 12, "bold"))
 word_label.pack(pady=10)
 
@@ -182,14 +258,23 @@ root.bind('<Control-s>', lambda e: save_to_file())
 root.bind('2', lambda e: comment_text.focus_set())
 root.bind('1', lambda e: listbox.focus_set())
 
-display_matches()
+if multi_choice_words:
+    display_matches()
+else:
+    word_label.config(text="all conflict words are resolved")
 
 root.mainloop()
 
+journal.close()
+
 # generate summary file
 with open(summary_file, 'w') as file:
     file.write(f'original text analyzed: {text_file}\n')
     file.write(f'output file: {file_name}_{version}_output.csv\n')
+    file.write(f'decisions journal: {journal_file}\n')
+    file.write(f'annotated words: {len(annotations)}\n')
+    file.write(f"conflict words resolved automatically: {auto_counts['nlp']} with NLP tags, "
+               f"{auto_counts['decision']} with previous decisions, {len(propagated)} by propagating decisions in this session\n")
         
     now = datetime.now()
     format_date = now.strftime("%A, %B %d, %Y - %H:%M:%S")
@@ -0,0 +1,177 @@
+'''
+Append-only journal of annotation decisions, shared by the annotation GUIs
+(annotate_pos_allWords.py and annotate_pos_conflictWords.py).
+
+Every decision is appended to a journal file ({file_name}_{version}_allWords_journal.jsonl
+or {file_name}_{version}_conflictWords_journal.jsonl) as one JSON line and written
+to disk immediately, so a session that crashes or is closed
+without saving loses nothing. When the GUI is opened again on the same text,
+the journal is read back and annotation resumes after the last annotated word.
+'''
+
+
+def read_journal(journal_file):
+    """
+    Parameters
+    ----------
+    journal_file : str
+        {file_name}_{version}_allWords_journal.jsonl or _conflictWords_journal.jsonl
+
+    Returns
+    -------
+    list of dict
+        journal entries in the order they were written; empty if there is no journal yet.
+        An incomplete last line (session interrupted while writing) is skipped.
+    """
+
+    import json
+
+    entries = []
+    try:
+        with open(journal_file, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    except FileNotFoundError:
+        pass
+
+    return entries
+
+
+def open_journal(journal_file):
+    """
+    Parameters
+    ----------
+    journal_file : str
+
+    Returns
+    -------
+    file object to pass to append_entry(); new entries are added after existing ones.
+    """
+
+    return open(journal_file, 'a', encoding='utf-8')
+
+
+def append_entry(journal, entry):
+    """
+    Parameters
+    ----------
+    journal : file object
+        from open_journal()
+    entry : dict
+        decision to record, e.g. {'position': 12, 'row': [...]}; must be JSON serializable
+
+    Returns
+    -------
+    None; entry is written as one line and flushed to disk before returning.
+    """
+
+    append_entries(journal, [entry])
+
+
+def append_entries(journal, entries):
+    """
+    Write entries (see append_entry()) one per line, flushed to disk once for all of them.
+    """
+
+    import os
+    import json
+
+    journal.write(''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries))
+    journal.flush()
+    os.fsync(journal.fileno())
+
+
+def resume_position(entries, count, tokens=None):
+    """
+    Parameters
+    ----------
+    entries : list of dict
+        from read_journal(), with 'position' (and 'row') of every decision
+    count : int
+        number of positions (words to annotate)
+    tokens : list of int, optional
+        token number (first value of output row) of every position, in order of text;
+        when given, annotation resumes at the first position after the token of the
+        last decision, so positions may differ from the previous session.
+
+    Returns
+    -------
+    int
+        position after the last annotated one (last position if the text is finished),
+        or 0 if nothing was annotated yet.
+    """
+
+    from bisect import bisect_right
+
+    if not entries or count == 0:
+        return 0
+
+    if tokens is None:
+        return min(entries[-1]['position'] + 1, count - 1)
+
+    return min(bisect_right(tokens, int(entries[-1]['row'][0])), count - 1)
+
+
+def new_store(entries=(), rows=()):
+    """
+    Parameters
+    ----------
+    entries : list of dict, optional
+        journal entries from read_journal(), applied in order; an entry with 'removed'
+        (token number) instead of 'row' removes the row of that token
+    rows : list, optional
+        rows added before journal entries (e.g. words annotated automatically)
+
+    Returns
+    -------
+    dict
+        annotation store {token number: output row}, token number being the first value
+        of the row. Later decisions on the same token replace earlier ones.
+    """
+
+    store = {}
+    for row in rows:
+        store_row(store, row)
+    for entry in entries:
+        if 'removed' in entry:
+            store.pop(int(entry['removed']), None)
+        else:
+            store_row(store, entry['row'])
+
+    return store
+
+
+def store_row(store, row):
+    """
+    Add output row to annotation store, replacing previous decision on the same token.
+    """
+
+    store[int(row[0])] = row
+
+
+def export_store(store, output_file):
+    """
+    Parameters
+    ----------
+    store : dict
+        from new_store()
+    output_file : str
+        {file_name}_{version}_output.csv
+
+    Returns
+    -------
+    int
+        number of rows written: one per annotated token, in order of the text.
+    """
+
+    import csv
+
+    with open(output_file, 'w', newline='') as f:
+        writer = csv.writer(f)
+        for token in sorted(store):
+            writer.writerow(store[token])
+
+    return len(store)
@@ -0,0 +1,180 @@
+'''
+Text display helpers shared by the annotation GUIs
+(annotate_pos_allWords.py and annotate_pos_conflictWords.py).
+
+Positions of words in the text widget are computed once, when the text is
+loaded, as Tk 'line.column' indices, so moving to another word only changes
+the highlight of two words, whatever the length of the text.
+
+Long texts can be displayed a window of sentences at a time (new_view() with
+window_sentences): only the window around the current word is inserted in
+the widget, and a new window is rendered when annotation moves out of it.
+'''
+
+
+def token_index(text, tokens):
+    """
+    Parameters
+    ----------
+    text : str
+        text as inserted in the Tk text widget
+    tokens : list
+        tokens of text, (word, sentence, start, end) from tokenizer.tokenize()
+
+    Returns
+    -------
+    list of (start, end) Tk text indices ('line.column') of every token, in order of tokens.
+    Lines are counted from 1 and columns from 0, as in Tk; line breaks anywhere
+    in the text are taken into account.
+    """
+
+    from bisect import bisect_right
+
+    lineStarts = [0]
+    position = text.find('\n')
+    while position != -1:
+        lineStarts.append(position + 1)
+        position = text.find('\n', position + 1)
+
+    def tk_index(offset):
+        line = bisect_right(lineStarts, offset) - 1
+        return f'{line + 1}.{offset - lineStarts[line]}'
+
+    return [(tk_index(start), tk_index(end)) for _, _, start, end in tokens]
+
+
+def move_highlight(text_widget, tag, previous, current):
+    """
+    Parameters
+    ----------
+    text_widget : tk.Text
+    tag : str
+        name of highlight tag
+    previous : tuple or None
+        (start, end) index of highlighted word, or None
+    current : tuple
+        (start, end) index of word to highlight, from token_index()
+
+    Returns
+    -------
+    current; removes tag from previous word only, adds it to current word
+    and scrolls the widget to show it.
+    """
+
+    if previous is not None:
+        text_widget.tag_remove(tag, *previous)
+    text_widget.tag_add(tag, *current)
+    text_widget.see(current[0])
+
+    return current
+
+
+def new_view(text_widget, text, tokens, window_sentences=None):
+    """
+    Parameters
+    ----------
+    text_widget : tk.Text
+        widget displaying the text
+    text : str
+        text to annotate
+    tokens : list
+        tokens of text, from tokenizer.tokenize()
+    window_sentences : int, optional
+        number of sentences displayed at a time around the current word; the whole
+        text is displayed if None. With long texts, only the window is inserted in the
+        widget and re-rendered when the current word moves out of it.
+
+    Returns
+    -------
+    dict
+        view state, used by show_token()
+    """
+
+    if window_sentences is not None and len(tokens) == 0:
+        window_sentences = None
+
+    view = {'widget': text_widget,
+            'text': text,
+            'tokens': tokens,
+            'window_sentences': window_sentences,
+            'window': (0, 0),
+            'positions': None,
+            'highlighted': None}
+
+    if window_sentences is None:
+        _render(view, 0, len(tokens), 0, len(text))
+    else:
+        # first token of every sentence
+        view['sentence_starts'] = [idx for idx, token in enumerate(tokens)
+                                   if idx == 0 or token[1] != tokens[idx - 1][1]]
+
+    return view
+
+
+def _render(view, firstToken, lastToken, start, end):
+    """
+    Display text[start:end], containing tokens firstToken to lastToken - 1.
+    """
+
+    import tkinter as tk
+
+    widget = view['widget']
+    state = widget.cget('state')
+    widget.config(state=tk.NORMAL)
+    widget.delete('1.0', tk.END)
+    widget.insert(tk.END, view['text'][start:end])
+    widget.config(state=state)
+
+    windowTokens = [(word, sentence, tokenStart - start, tokenEnd - start)
+                    for word, sentence, tokenStart, tokenEnd in view['tokens'][firstToken:lastToken]]
+
+    view['window'] = (firstToken, lastToken)
+    view['positions'] = token_index(view['text'][start:end], windowTokens)
+    view['highlighted'] = None
+
+
+def _render_window(view, idx):
+    """
+    Display the window of sentences centered on the sentence of token idx.
+    """
+
+    from bisect import bisect_right
+
+    sentenceStarts = view['sentence_starts']
+    tokens = view['tokens']
+
+    sentence = bisect_right(sentenceStarts, idx) - 1
+    first = max(min(sentence - view['window_sentences'] // 2, len(sentenceStarts) - view['window_sentences']), 0)
+    last = min(first + view['window_sentences'], len(sentenceStarts))
+
+    firstToken = sentenceStarts[first]
+    lastToken = sentenceStarts[last] if last < len(sentenceStarts) else len(tokens)
+    start = 0 if first == 0 else tokens[firstToken][2]
+    end = tokens[lastToken][2] if lastToken < len(tokens) else len(view['text'])
+
+    _render(view, firstToken, lastToken, start, end)
+
+
+def show_token(view, idx, tag='highlight'):
+    """
+    Parameters
+    ----------
+    view : dict
+        from new_view()
+    idx : int
+        token to highlight
+    tag : str, optional
+        name of highlight tag
+
+    Returns
+    -------
+    None; highlights token idx, rendering a new window first if it is outside the displayed one.
+    """
+
+    firstToken, lastToken = view['window']
+    if not firstToken <= idx < lastToken:
+        _render_window(view, idx)
+        firstToken, _ = view['window']
+
+    view['highlighted'] = move_highlight(view['widget'], tag, view['highlighted'],
+                                         view['positions'][idx - firstToken])
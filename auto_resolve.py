@@ -0,0 +1,228 @@
+'''
+Automatic resolution of conflict words for annotate_pos_conflictWords.py.
+
+Before annotation starts, words with two or more options in the identified
+file are resolved automatically where the choice can be made without an
+annotator:
+    nlp:      the NLP pipeline output of the same text ({file_name}_identifiedWords_NLP.txt)
+              tagged the word with one part of speech only, and exactly one of its
+              options has that part of speech.
+    decision: the annotator already chose an option for the same word in an earlier
+              session (journal), either anywhere in the text (propagate='form') or
+              between the same previous and next words (propagate='context').
+During annotation, each new decision is propagated the same way to words further
+in the text. Rows resolved automatically are journaled too, those resolved with
+a decision with the word it was copied from ('source'): when the annotator
+changes the decision on that word, its copies are changed with it (or removed,
+if the new decision has no choice). Words that already have a journal entry
+are never resolved again: words annotated in an earlier session stay in the
+queue, so the annotator can go back to them, and words resolved automatically
+in an earlier session keep their journaled row and are not counted again. Automatically resolved rows have the rule in their comment column
+('auto: nlp', 'auto: decision'), so they can be checked in the output file.
+'''
+
+def read_nlp_tags(nlp_identified_file):
+    """
+    Parameters
+    ----------
+    nlp_identified_file : str
+        {file_name}_identifiedWords_NLP.txt written by analyze_text_NLP()
+
+    Returns
+    -------
+    dict
+        {word: set of parts of speech spacy gave it in the text}; the NLP output only has
+        rows whose corpus part of speech is the one spacy tagged. Empty if file does not exist.
+    """
+
+    import csv
+
+    tags = {}
+    try:
+        with open(nlp_identified_file, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f, delimiter='\t'):
+                tags.setdefault(row['conjugation'], set()).add(row['part_of_speech'])
+    except FileNotFoundError:
+        pass
+
+    return tags
+
+
+def context_key(words, idx, propagate):
+    """
+    Key of the word at idx for reusing decisions: the word itself (propagate='form'),
+    or the word with its previous and next word (propagate='context').
+    """
+
+    if propagate == 'form':
+        return words[idx]
+
+    previous = words[idx - 1] if idx > 0 else ''
+    following = words[idx + 1] if idx + 1 < len(words) else ''
+
+    return (previous, words[idx], following)
+
+
+def nlp_choice(options, nlpTags):
+    """
+    Option (identified file row) whose part of speech is the only one spacy gave the word,
+    or None if spacy tags are missing or ambiguous, or several options match.
+    """
+
+    if len(nlpTags) != 1:
+        return None
+
+    partOfSpeech, = nlpTags
+    matches = {tuple(row) for row in options if row[2] == partOfSpeech}
+
+    return list(matches.pop()) if len(matches) == 1 else None
+
+
+def known_decisions(entries, words, propagate):
+    """
+    {context_key(): (chosen option, token number)} of annotator decisions in journal entries
+    (annotation_journal.read_journal()); comment only rows and automatic decisions are left out.
+    """
+
+    decisions = {}
+    for entry in entries:
+        if entry.get('auto') or entry['row'][1] == '':
+            continue
+        row = entry['row']
+        decisions[context_key(words, int(row[0]) - 1, propagate)] = (list(row[1:5]), int(row[0]))
+
+    return decisions
+
+
+def journal_tokens(entries):
+    """
+    {token number: 'auto' value of latest journal entry of token (None for annotator decisions)}
+    of journal entries (annotation_journal.read_journal()); removed rows are left out.
+    """
+
+    tokens = {}
+    for entry in entries:
+        if 'removed' in entry:
+            tokens.pop(int(entry['removed']), None)
+        else:
+            tokens[int(entry['row'][0])] = entry.get('auto')
+
+    return tokens
+
+
+def copy_sources(entries):
+    """
+    {token number: token number of annotator decision it was copied from} of rows resolved 
+    with a decision whose row is still the latest one of their token, from journal entries.
+    """
+
+    sources = {}
+    for entry in entries:
+        token = int(entry['removed'] if 'removed' in entry else entry['row'][0])
+        if 'source' in entry and 'removed' not in entry:
+            sources[token] = int(entry['source'])
+        else:
+            sources.pop(token, None)
+
+    return sources
+
+
+def auto_resolve(queue, words, word_data, nlp_tags=None, decisions=None, propagate='context', journaled=None):
+    """
+    Parameters
+    ----------
+    queue : list of (word, idx)
+        conflict words to annotate, in order of text
+    words : list of str
+        all words of text (idx of queue refers to it)
+    word_data : dict
+        {word: identified file rows}
+    nlp_tags : dict, optional
+        from read_nlp_tags(); no nlp rule if None
+    decisions : dict, optional
+        from known_decisions(); no decision rule if None
+    propagate : str or None, optional
+        'form' or 'context', see context_key(); no decision rule if None
+    journaled : dict, optional
+        from journal_tokens(): words annotated earlier stay in queue, words resolved
+        automatically in an earlier session are left out of queue (their rows are in journal);
+        neither is resolved or counted here
+
+    Returns
+    -------
+    tuple
+        rows: output rows of words resolved now ([idx+1, lemma, conjugation, part_of_speech,
+              relative_frequency, 'auto: rule'])
+        remaining: queue without resolved words
+        counts: {rule: number of words resolved now}
+        sources: {token number: token number of annotator decision} of words resolved with a decision
+    """
+
+    rows = []
+    remaining = []
+    counts = {'nlp': 0, 'decision': 0}
+    sources = {}
+
+    for word, idx in queue:
+        if journaled and idx + 1 in journaled:
+            if journaled[idx + 1] is None:
+                remaining.append((word, idx))
+            continue
+
+        choice, rule = None, None
+        if decisions and propagate:
+            choice, source = decisions.get(context_key(words, idx, propagate), (None, None))
+            rule = 'decision'
+            if choice is not None:
+                sources[idx + 1] = source
+        if choice is None and nlp_tags:
+            choice = nlp_choice(word_data.get(word, []), nlp_tags.get(word, set()))
+            rule = 'nlp'
+
+        if choice is None:
+            remaining.append((word, idx))
+        else:
+            rows.append([idx+1] + list(choice) + [f'auto: {rule}'])
+            counts[rule] += 1
+
+    return rows, remaining, counts, sources
+
+
+def queue_keys(queue, words, propagate='context'):
+    """
+    {context_key(): [(position in queue, idx)]} of conflict words, for propagate_decision().
+    """
+
+    keys = {}
+    if propagate is not None:
+        for position, (word, idx) in enumerate(queue):
+            keys.setdefault(context_key(words, idx, propagate), []).append((position, idx))
+
+    return keys
+
+
+def propagate_decision(keys, start, words, row, propagate='context'):
+    """
+    Parameters
+    ----------
+    keys : dict
+        from queue_keys()
+    start : int
+        position in queue of the word just annotated
+    words : list of str
+        all words of text
+    row : list
+        output row of annotator decision ([idx+1, lemma, conjugation, part_of_speech, relative_frequency, comment])
+    propagate : str or None, optional
+        'form' or 'context', see context_key()
+
+    Returns
+    -------
+    list of (position in queue, output row) for later words in queue resolved by the decision
+    """
+
+    if propagate is None or row[1] == '':
+        return []
+
+    return [(position, [idx+1] + list(row[1:5]) + ['auto: decision'])
+            for position, idx in keys.get(context_key(words, int(row[0]) - 1, propagate), []) if position > start]
@@ -0,0 +1,90 @@
+'''
+Measures how long it takes to import each module of the repository.
+
+Modules must not load pandas, spacy or reference files when imported: heavy
+libraries are imported inside functions, and reference data is loaded on first
+use (or through preload hooks such as is_it_in.preload(),
+lexicon_index.build_lexicon_index() and analyze_text_NLP.load_nlp_model()).
+Every module is imported in a fresh python process, and its import time is
+compared with the budget below.
+
+Usage from command line:
+python check_import_times.py
+'''
+
+# import time budget per module, in seconds
+importBudgets = {'LIX': 0.02,
+                 'convert_flexikon': 0.02,
+                 'lexicon_index': 0.02,
+                 'reference_cache': 0.02,
+                 'analysis_results': 0.02,
+                 'analyze_text_FLEXIKON': 0.02,
+                 'analyze_text_NLP': 0.02,
+                 'analyze_texts_batch': 0.02,
+                 'is_it_in': 0.02,
+                 'tokenizer': 0.02,
+                 'annotation_view': 0.02,
+                 'annotation_journal': 0.02,
+                 'lookup_server': 0.02,
+                 'compiled_lexicon': 0.02,
+                 'incremental_analysis': 0.02,
+                 'suggest_words': 0.02,
+                 'frequency_report': 0.02,
+                 'auto_resolve': 0.02}
+
+
+def measure_import_time(module):
+    """
+    Parameters
+    ----------
+    module : str
+        module name, e.g. 'is_it_in'
+
+    Returns
+    -------
+    float
+        seconds needed to import module in a fresh python process.
+    """
+
+    import os
+    import sys
+    import subprocess
+
+    code = ('import time, importlib; startTime = time.perf_counter(); '
+            f'importlib.import_module({module!r}); print(time.perf_counter() - startTime)')
+
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    return float(result.stdout.strip())
+
+
+def check_import_times(budgets=importBudgets):
+    """
+    Parameters
+    ----------
+    budgets : dict, optional
+        {module: import time budget in seconds}
+
+    Returns
+    -------
+    list of modules over budget; prints import time of every module.
+    """
+
+    overBudget = []
+
+    for module, budget in budgets.items():
+        seconds = measure_import_time(module)
+        status = 'ok' if seconds <= budget else 'OVER BUDGET'
+        print(f'{module:<24}{seconds * 1000:8.1f} ms  (budget {budget * 1000:.0f} ms)  {status}')
+        if seconds > budget:
+            overBudget.append(module)
+
+    return overBudget
+
+
+if __name__ == '__main__':
+
+    import sys
+
+    sys.exit(1 if check_import_times() else 0)
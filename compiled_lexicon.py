@@ -0,0 +1,297 @@
+'''
+Compiled lexicon: flexikon and corpus indexes in one read-only binary file.
+
+The file holds the same two indexes as lexicon_index.build_lexicon_index():
+inflectional form -> flexikon rows, and lemma -> corpus rows. Keys are stored
+as a sorted string table with an array of offsets, so a word is found by
+binary search directly in the file, which is opened with mmap. Nothing is
+parsed when the file is opened: every process using the same lexicon file
+shares one copy of it in the operating system's page cache, and startup takes
+milliseconds.
+
+Usage in IPython:
+from compiled_lexicon import compile_lexicon, open_lexicon
+compile_lexicon('flexikon_rows.txt', 'lemma-30k-2017.txt', 'lexicon-30k.lex')
+index = open_lexicon('lexicon-30k.lex', 'flexikon_rows.txt', 'lemma-30k-2017.txt')
+index['forms'].get('huse')
+analyze_text_FLEXIKON('SAMPLE_TEXT.txt', 'flexikon_rows.txt', 'lemma-30k-2017.txt', lexicon_index=index)
+
+Usage from command line:
+python compiled_lexicon.py flexikon_rows.txt lemma-30k-2017.txt lexicon-30k.lex
+'''
+
+magic = b'DALEX\x00\x00\x01'
+
+# row layout of each index, as in lexicon_index._group_rows()
+sectionColumns = {'forms': ('part_of_speech_tag', 'lemma', 'conjugation', 'part_of_speech'),
+                  'lemmas': ('part_of_speech_tag', 'lemma', 'relative_frequency', 'part_of_speech')}
+
+# missing values (None) and missing keys are written as these markers, which cannot occur in reference files
+_noneField = '\\N'
+_noneKey = b'\x00'
+
+
+def _encode_rows(rows):
+
+    return '\n'.join('\t'.join(_noneField if value is None else repr(value) if isinstance(value, float) else value
+                               for value in row)
+                     for row in rows).encode('utf-8')
+
+
+def _write_section(file, groups, header):
+    """
+    Write one index {key: [rows]} as keys sorted by their utf-8 bytes, key offsets,
+    row offsets and rows; positions of the four parts are added to header.
+    """
+
+    from array import array
+
+    keys = sorted((_noneKey if key is None else key.encode('utf-8'), key) for key in groups)
+
+    keyOffsets = array('Q', [0])
+    valueOffsets = array('Q', [0])
+    keyBlob = bytearray()
+    valueBlob = bytearray()
+    for encodedKey, key in keys:
+        keyBlob += encodedKey
+        keyOffsets.append(len(keyBlob))
+        valueBlob += _encode_rows(groups[key])
+        valueOffsets.append(len(valueBlob))
+
+    for part, data in (('key_offsets', keyOffsets.tobytes()), ('keys', bytes(keyBlob)),
+                       ('value_offsets', valueOffsets.tobytes()), ('values', bytes(valueBlob))):
+        # offset arrays start at multiples of 8 bytes
+        file.write(b'\x00' * (-file.tell() % 8))
+        header[part] = [file.tell(), len(data)]
+        file.write(data)
+
+    header['count'] = len(keys)
+
+
+def compile_lexicon(flexikon_rows_file, corpus_file, lexicon_file):
+    """
+    Parameters
+    ----------
+    flexikon_rows_file : str: 'filename.txt', or None
+        Flexikon file formatted as rows using convert_flexikon();
+        None for a lexicon with corpus lemmas only (e.g. other corpus for is_it_in).
+    corpus_file : str: 'filename.txt'
+        Corpus file containing lemmas and their relative frequency.
+    lexicon_file : str
+        compiled lexicon file to write, e.g. 'lexicon-30k.lex'
+
+    Returns
+    -------
+    compiled lexicon file
+    dict
+        number of forms and lemmas written
+
+    Examples
+    --------
+    compile_lexicon("flexikon_rows.txt", "lemma-30k-2017.txt", "lexicon-30k.lex")
+    compile_lexicon(None, "lemma-10k-2017-in.txt", "lemma-10k.lex")
+    """
+
+    import os
+    import sys
+    import json
+    import struct
+    from lexicon_index import build_lexicon_index, build_corpus_index
+    from reference_cache import _source_key
+
+    if flexikon_rows_file is None:
+        groups = {'forms': {}, 'lemmas': build_corpus_index(corpus_file)}
+    else:
+        index = build_lexicon_index(flexikon_rows_file, corpus_file)
+        groups = {'forms': index['forms'], 'lemmas': index['lemmas']}
+
+    header = {'byteorder': sys.byteorder,
+              'flexikon_rows_file': flexikon_rows_file,
+              'corpus_file': corpus_file,
+              # path, size and modification time of reference files, checked by open_lexicon()
+              'sources': {'flexikon_rows_file': None if flexikon_rows_file is None else list(_source_key(flexikon_rows_file)),
+                          'corpus_file': list(_source_key(corpus_file))},
+              'sections': {}}
+
+    # sections are written after a fixed size space for the header, which is filled in last
+    headerSpace = 4096
+    temporaryFile = f'{lexicon_file}.tmp'
+    with open(temporaryFile, 'wb') as file:
+        file.write(b'\x00' * headerSpace)
+        for name in ('forms', 'lemmas'):
+            header['sections'][name] = {}
+            _write_section(file, groups[name], header['sections'][name])
+
+        encodedHeader = json.dumps(header).encode('utf-8')
+        if len(magic) + 8 + len(encodedHeader) > headerSpace:
+            raise ValueError('reference file names are too long for lexicon header')
+        file.seek(0)
+        file.write(magic + struct.pack('<Q', len(encodedHeader)) + encodedHeader)
+
+    os.replace(temporaryFile, lexicon_file)
+
+    return {name: header['sections'][name]['count'] for name in ('forms', 'lemmas')}
+
+
+class _Section:
+    """
+    One index of a compiled lexicon, read through mmap. Answers get(), `in` and []
+    like the dictionaries of lexicon_index, so it can be used in their place.
+    """
+
+    def __init__(self, buffer, header, columns):
+
+        self._buffer = buffer
+        self._count = header['count']
+        view = memoryview(buffer)
+        self._keyOffsets = view[slice(*_span(header['key_offsets']))].cast('Q')
+        self._valueOffsets = view[slice(*_span(header['value_offsets']))].cast('Q')
+        self._keys = _span(header['keys'])[0]
+        self._values = _span(header['values'])[0]
+        self._floats = [column == 'relative_frequency' for column in columns]
+
+    def _key(self, position):
+
+        return self._buffer[self._keys + self._keyOffsets[position]:self._keys + self._keyOffsets[position + 1]]
+
+    def _find(self, key):
+        """
+        Position of key in sorted key table (binary search), or -1.
+        """
+
+        encodedKey = _noneKey if key is None else key.encode('utf-8')
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < encodedKey:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low < self._count and self._key(low) == encodedKey:
+            return low
+        return -1
+
+    def _rows(self, position):
+
+        data = self._buffer[self._values + self._valueOffsets[position]:self._values + self._valueOffsets[position + 1]]
+
+        rows = []
+        for line in data.decode('utf-8').split('\n'):
+            rows.append(tuple(None if value == _noneField else float(value) if isFloat else value
+                              for value, isFloat in zip(line.split('\t'), self._floats)))
+        return rows
+
+    def get(self, key, default=None):
+
+        if not isinstance(key, str) and key is not None:
+            return default
+        position = self._find(key)
+        return default if position < 0 else self._rows(position)
+
+    def __getitem__(self, key):
+
+        rows = self.get(key)
+        if rows is None:
+            raise KeyError(key)
+        return rows
+
+    def __contains__(self, key):
+
+        return (isinstance(key, str) or key is None) and self._find(key) >= 0
+
+    def __len__(self):
+
+        return self._count
+
+    def __iter__(self):
+
+        for position in range(self._count):
+            key = self._key(position)
+            yield None if key == _noneKey else key.decode('utf-8')
+
+
+def _span(part):
+
+    offset, length = part
+    return offset, offset + length
+
+
+def _check_sources(lexicon_file, header, given):
+    """
+    Raise ValueError if lexicon was not compiled from given reference files {name: file}
+    as they are now: other file, or file changed since compile_lexicon().
+    """
+
+    import os
+    from reference_cache import _source_key
+
+    sources = header.get('sources')
+    if sources is None:
+        raise ValueError(f'{lexicon_file} has no reference file details; compile it again')
+
+    for name, reference_file in given.items():
+        if reference_file is None:
+            continue
+        compiled = sources.get(name)
+        if compiled is None or compiled[0] != os.path.abspath(reference_file):
+            raise ValueError(f'{lexicon_file} was compiled from {compiled[0] if compiled else None}, '
+                             f'not {reference_file}; compile it again')
+        if os.path.exists(reference_file) and list(_source_key(reference_file)) != compiled:
+            raise ValueError(f'{reference_file} changed since {lexicon_file} was compiled; compile it again')
+
+
+def open_lexicon(lexicon_file, flexikon_rows_file=None, corpus_file=None):
+    """
+    Parameters
+    ----------
+    lexicon_file : str
+        file written by compile_lexicon()
+    flexikon_rows_file, corpus_file : str, optional
+        reference files the lexicon is used in place of. If given, the lexicon must have been
+        compiled from these files, unchanged since (same path, size and modification time);
+        ValueError otherwise. A file that does not exist here is checked by path only.
+
+    Returns
+    -------
+    dict
+        lexicon index, as lexicon_index.build_lexicon_index() but read from the file on demand:
+        'forms', 'lemmas': indexes answering get(), `in` and [] with the same rows as dictionaries,
+        'flexikon_rows_file', 'corpus_file': reference files the lexicon was compiled from.
+        Can be passed as lexicon_index to analyze_text_FLEXIKON() (lookup mode),
+        and its 'lemmas' as corpus_index to analyze_text_NLP().
+    """
+
+    import sys
+    import json
+    import mmap
+    import struct
+
+    with open(lexicon_file, 'rb') as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if buffer[:len(magic)] != magic:
+        raise ValueError(f'{lexicon_file} is not a compiled lexicon (see compile_lexicon())')
+    headerLength, = struct.unpack('<Q', buffer[len(magic):len(magic) + 8])
+    header = json.loads(buffer[len(magic) + 8:len(magic) + 8 + headerLength].decode('utf-8'))
+    if header['byteorder'] != sys.byteorder:
+        raise ValueError(f'{lexicon_file} was compiled on a {header["byteorder"]} endian system; compile it again here')
+    if flexikon_rows_file is not None or corpus_file is not None:
+        _check_sources(lexicon_file, header, {'flexikon_rows_file': flexikon_rows_file, 'corpus_file': corpus_file})
+
+    return {'forms': _Section(buffer, header['sections']['forms'], sectionColumns['forms']),
+            'lemmas': _Section(buffer, header['sections']['lemmas'], sectionColumns['lemmas']),
+            'flexikon_rows_file': header['flexikon_rows_file'],
+            'corpus_file': header['corpus_file'],
+            'lexicon_file': lexicon_file}
+
+
+if __name__ == '__main__':
+
+    import sys
+
+    if len(sys.argv) != 4:
+        sys.exit('usage: python compiled_lexicon.py flexikon_rows.txt corpus.txt lexicon.lex')
+
+    counts = compile_lexicon(sys.argv[1], sys.argv[2], sys.argv[3])
+    print(f"{sys.argv[3]}: {counts['forms']} forms, {counts['lemmas']} lemmas")
@@ -1,4 +1,4 @@
-def convert_flexikon(flexikon_file,result_file):
+def convert_flexikon(flexikon_file,result_file,report_every=500000):
     """ 
     Parameters
     ----------
@@ -6,36 +6,62 @@ def convert_flexikon(flexikon_file,result_file):
         Original unformatted flexikon document.
     result_file : str: 'resultfile.txt'
         Output file formatted flexikon as table.
+    report_every : int, optional
+        print progress after every report_every rows written; 0 or None to print only the final count.
 
     Returns
     -------
-    None.
+    int
+        number of rows written to result_file.
     
     Function
     -------
     Converts original flexikon to a table.
     https://korpus.dsl.dk/resources/details/flexikon.html
     
+    Original flexikon lists each lemma as a block: lemma, part of speech tag, and one line 
+    per inflectional form (tab separated, form in second column); blocks are separated by a line with *.
+    Output has one row per inflectional form: part of speech tag, lemma, inflectional form (tab separated).
+    
     @AUTHOR: Aleksandra Kaszowska, 02/10/2023
+    
+    version update from 17/10/2026:
+        - flexikon is read line by line and rows are written as they are read, 
+          so memory use does not grow with the size of the flexikon file.
+        - reports number of rows written and rows/second.
     """
     
-    import re
+    import time
     
-    with open(flexikon_file, encoding='utf-8') as file_object:
-        contents = file_object.read() 
+    startTime = time.perf_counter()
+    rowCounter = 0
     
-    contents = contents[2:]
+    with open(flexikon_file, encoding='utf-8') as file_object, \
+         open(result_file, 'w', encoding='utf-8', buffering=1024*1024) as f:
+        
+        file_object.read(2) # skip separator line opening the file
         
-    allCategoriesList = re.split('\n\*\n',contents)
-    
-    with open(result_file, 'w', encoding='utf-8') as f:
-    
-        for item in allCategoriesList:
-            itemList = re.split('\n',item)
-            counter = 2
-            while counter <= len(itemList)-1:
-                newItem = re.split('\t', itemList[counter])
-                newLine = f"{itemList[1]}\t{itemList[0]}\t{newItem[1]}\n"
-                f.write(newLine)
-                counter += 1
-        
\ No newline at end of file
+        lemma = None
+        tag = None
+        
+        for line in file_object:
+            line = line.rstrip('\n')
+            if line == '*':
+                lemma = None
+                tag = None
+            elif lemma is None:
+                lemma = line
+            elif tag is None:
+                tag = line
+            else:
+                newItem = line.split('\t')
+                f.write(f"{tag}\t{lemma}\t{newItem[1]}\n")
+                rowCounter += 1
+                if report_every and rowCounter % report_every == 0:
+                    elapsed = time.perf_counter() - startTime
+                    print(f'{rowCounter} rows converted ({rowCounter / elapsed:.0f} rows/second)')
+    
+    elapsed = time.perf_counter() - startTime
+    print(f'{rowCounter} rows written to {result_file} in {elapsed:.1f} s ({rowCounter / max(elapsed, 1e-9):.0f} rows/second)')
+    
+    return rowCounter
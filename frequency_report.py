@@ -0,0 +1,287 @@
+'''
+Frequency profile of many analyzed texts, and counterbalancing between conditions.
+
+Reads the _identifiedWords_ and _missingWords_ files written by
+analyze_text_FLEXIKON() or analyze_text_NLP() for all texts at once, and
+computes, per text and per condition: mean and median log10 relative
+frequency, share of words missing from the corpus (and from other word lists,
+e.g. 10k and 30k lemma lists), and part of speech distribution. The balance
+report compares log frequencies of every pair of conditions.
+
+Each distinct word of a text counts once, with the frequency of its most
+frequent reading (lemma and part of speech). Texts are named by their path,
+without .txt, relative to the folder containing all of them (e.g. 'easy/story1'
+and 'hard/story1'), so texts with the same file name in different folders
+are kept apart.
+
+Usage in IPython:
+from frequency_report import frequency_report
+frequency_report('stimuli/', 'FLEXIKON', conditions='conditions.txt',
+                 word_lists={'10k': 'lemma-10k-2017-in.txt', '30k': 'lemma-30k-2017.txt'})
+'''
+
+
+def text_names(textFiles):
+    """
+    Parameters
+    ----------
+    textFiles : list of str
+        analyzed text files
+
+    Returns
+    -------
+    dict
+        {text file: name}, name being the path of text without .txt relative to the folder 
+        containing all texts (file name only if all texts are in one folder)
+    """
+
+    import os
+
+    if len(textFiles) == 0:
+        return {}
+
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(file)) for file in textFiles])
+
+    return {file: os.path.splitext(os.path.relpath(os.path.abspath(file), root))[0].replace(os.sep, '/')
+            for file in textFiles}
+
+
+def read_conditions(conditions, textFiles):
+    """
+    Parameters
+    ----------
+    conditions : dict or str
+        {text: condition}, or tab separated file with two columns (text, condition) and no header.
+        Text is the text file, or its name (text_names()), with or without .txt
+    textFiles : list of str
+        analyzed text files
+
+    Returns
+    -------
+    dict
+        {text name (text_names()): condition} of texts with a condition
+    """
+
+    import os
+    import csv
+
+    if isinstance(conditions, str):
+        with open(conditions, 'r', encoding='utf-8', newline='') as file:
+            conditions = {row[0]: row[1] for row in csv.reader(file, delimiter='\t') if len(row) >= 2}
+
+    byPath = {os.path.abspath(os.path.splitext(text)[0]): condition for text, condition in conditions.items()}
+    byName = {os.path.splitext(text)[0].replace(os.sep, '/'): condition for text, condition in conditions.items()}
+
+    conditionOf = {}
+    for text_file, name in text_names(textFiles).items():
+        condition = byName.get(name, byPath.get(os.path.abspath(os.path.splitext(text_file)[0])))
+        if condition is not None:
+            conditionOf[name] = condition
+
+    return conditionOf
+
+
+def load_outputs(textFiles, version):
+    """
+    Parameters
+    ----------
+    textFiles : list of str
+        analyzed text files
+    version : str
+        'FLEXIKON' or 'NLP'
+
+    Returns
+    -------
+    tuple
+        words: dataframe with one row per distinct identified word of each text, with columns 
+               text (text_names()), word, lemma, part_of_speech, relative_frequency (most frequent reading)
+        missing: dataframe with one row per missing word of each text, with columns text, word
+        skipped: {text name: error} of texts whose output files cannot be read (e.g. not analyzed, 
+                 or analysis failed); they are reported and left out of words and missing
+    """
+
+    import pandas as pd
+    from analyze_texts_batch import _error_record
+
+    names = text_names(textFiles)
+
+    identified = []
+    missing = []
+    skipped = {}
+    for text_file in textFiles:
+        textname = text_file[:-4]
+        text = names[text_file]
+
+        try:
+            table = pd.read_csv(f'{textname}_identifiedWords_{version}.txt', sep='\t', keep_default_na=False,
+                                na_values={'relative_frequency': ['']}, dtype={'lemma': str, 'conjugation': str})
+            with open(f'{textname}_missingWords_{version}.txt', 'r') as file:
+                missingWords = [line.rstrip('\n') for line in file]
+        except Exception as error:
+            skipped[text] = _error_record(text_file, error)['status']
+            continue
+
+        identified.append(table.assign(text=text))
+        missing.append(pd.DataFrame({'text': text, 'word': missingWords}))
+
+    identified = pd.concat(identified, ignore_index=True) if identified else \
+        pd.DataFrame(columns=['lemma','conjugation','part_of_speech','relative_frequency','text'])
+    missing = pd.concat(missing, ignore_index=True) if missing else pd.DataFrame(columns=['text','word'])
+
+    # most frequent reading of every word; rows without frequency only if the word has no other reading
+    identified = identified.rename(columns={'conjugation': 'word'})
+    identified = identified.sort_values('relative_frequency', ascending=False, na_position='last', kind='stable')
+    words = identified.drop_duplicates(['text','word']).sort_index()
+
+    return words[['text','word','lemma','part_of_speech','relative_frequency']].reset_index(drop=True), missing, skipped
+
+
+def _profile(words, missing, group, word_lists):
+    """
+    Frequency statistics of words grouped by column group ('text' or 'condition').
+    """
+
+    import numpy as np
+    import pandas as pd
+
+    logFrequency = np.log10(words['relative_frequency'].to_numpy(dtype=float))
+    words = words.assign(log_frequency=logFrequency)
+
+    groups = pd.Index(words[group].unique()).union(pd.Index(missing[group].unique()), sort=False)
+
+    grouped = words.groupby(group, sort=False)
+    profile = pd.DataFrame({'words': grouped['word'].size(),
+                            'mean_log_frequency': grouped['log_frequency'].mean(),
+                            'median_log_frequency': grouped['log_frequency'].median(),
+                            'sd_log_frequency': grouped['log_frequency'].std()}).reindex(groups)
+
+    profile['words'] = profile['words'].fillna(0).astype(int)
+    profile['missing_words'] = missing.groupby(group, sort=False).size().reindex(groups, fill_value=0)
+    profile['missing_share'] = profile['missing_words'] / (profile['words'] + profile['missing_words'])
+
+    # missing words are not in the analysis corpus, and are counted as outside every list
+    for name, lemmas in word_lists.items():
+        outside = words.assign(outside=~words['lemma'].isin(lemmas)).groupby(group, sort=False)['outside'].sum()
+        outside = outside.reindex(groups, fill_value=0) + profile['missing_words']
+        profile[f'outside_{name}_share'] = outside / (profile['words'] + profile['missing_words'])
+
+    partsOfSpeech = pd.crosstab(words[group], words['part_of_speech'].fillna('UNKNOWN'), normalize='index')
+    partsOfSpeech.columns = [f'pos_{column}' for column in partsOfSpeech.columns]
+
+    profile = profile.join(partsOfSpeech)
+    profile.index.name = group
+
+    return profile.reset_index()
+
+
+def balance_table(words, max_difference=0.2):
+    """
+    Parameters
+    ----------
+    words : dataframe
+        distinct words of all texts (load_outputs()), with column condition
+    max_difference : float, optional
+        largest standardized mean difference (Cohen's d) of log frequency accepted as balanced
+
+    Returns
+    -------
+    dataframe with one row per pair of conditions: mean log frequency of both,
+    difference, Cohen's d, Welch's t, and balanced (abs(d) <= max_difference)
+    """
+
+    import itertools
+    import numpy as np
+    import pandas as pd
+
+    logFrequency = np.log10(words['relative_frequency'].to_numpy(dtype=float))
+    valid = np.isfinite(logFrequency)
+    conditions = words['condition'].to_numpy()[valid]
+    logFrequency = logFrequency[valid]
+
+    # count, mean and variance of every condition in one pass over all words
+    names, codes = np.unique(conditions.astype(str), return_inverse=True)
+    counts = np.bincount(codes, minlength=len(names)).astype(float)
+    means = np.bincount(codes, weights=logFrequency, minlength=len(names)) / np.maximum(counts, 1)
+    squares = np.bincount(codes, weights=(logFrequency - means[codes]) ** 2, minlength=len(names))
+    variances = squares / np.maximum(counts - 1, 1)
+
+    rows = []
+    for a, b in itertools.combinations(range(len(names)), 2):
+        difference = means[a] - means[b]
+        pooled = np.sqrt(((counts[a] - 1) * variances[a] + (counts[b] - 1) * variances[b]) / max(counts[a] + counts[b] - 2, 1))
+        standardError = np.sqrt(variances[a] / max(counts[a], 1) + variances[b] / max(counts[b], 1))
+        d = difference / pooled if pooled > 0 else np.nan
+        rows.append({'condition_a': names[a],
+                     'condition_b': names[b],
+                     'words_a': int(counts[a]),
+                     'words_b': int(counts[b]),
+                     'mean_log_frequency_a': means[a],
+                     'mean_log_frequency_b': means[b],
+                     'difference': difference,
+                     'cohens_d': d,
+                     'welch_t': difference / standardError if standardError > 0 else np.nan,
+                     'balanced': bool(abs(d) <= max_difference) if not np.isnan(d) else False})
+
+    return pd.DataFrame(rows, columns=['condition_a','condition_b','words_a','words_b','mean_log_frequency_a',
+                                       'mean_log_frequency_b','difference','cohens_d','welch_t','balanced'])
+
+
+def frequency_report(texts,version,report_file='frequency_report.txt',conditions=None,word_lists=None,max_difference=0.2):
+    """
+    Parameters
+    ----------
+    texts : str or list of str
+        folder with analyzed .txt files, glob pattern (e.g. 'stimuli/*.txt'), or list of text files.
+    version : str
+        'FLEXIKON' or 'NLP': which output files to read.
+    report_file : str, optional
+        tab separated report with one row per text.
+    conditions : dict or str, optional
+        condition of every text (see read_conditions()); texts without condition are in condition 'all'.
+    word_lists : dict, optional
+        {name: corpus file}, e.g. {'10k': 'lemma-10k-2017-in.txt', '30k': 'lemma-30k-2017.txt'}:
+        adds share of words whose lemma is not in each list (missing words included, as outside).
+    max_difference : float, optional
+        see balance_table().
+
+    Returns
+    -------
+    report_file (status of every text: 'ok', or error of a text whose output files cannot be read,
+    which is left out of all statistics), {report_file without .txt}_conditions.txt (one row per condition)
+    and {report_file without .txt}_balance.txt (one row per pair of conditions).
+    dict
+        'texts', 'conditions', 'balance': the three tables as dataframes.
+
+    Examples
+    --------
+    frequency_report("stimuli/", "FLEXIKON", conditions={"story1": "easy", "story2": "hard"})
+    """
+
+    from analyze_texts_batch import find_text_files
+    from lexicon_index import build_corpus_index
+
+    textFiles = find_text_files(texts, exclude=[report_file, f'{report_file[:-4]}_conditions.txt',
+                                                f'{report_file[:-4]}_balance.txt'])
+    words, missing, skipped = load_outputs(textFiles, version)
+
+    conditionOf = read_conditions(conditions, textFiles) if conditions is not None else {}
+    words['condition'] = words['text'].map(conditionOf).fillna('all')
+    missing['condition'] = missing['text'].map(conditionOf).fillna('all')
+
+    lemmaLists = {name: list(build_corpus_index(corpus_file)) for name, corpus_file in (word_lists or {}).items()}
+
+    tables = {'texts': _profile(words, missing, 'text', lemmaLists),
+              'conditions': _profile(words, missing, 'condition', lemmaLists),
+              'balance': balance_table(words, max_difference)}
+
+    # one row per text in order of texts, including texts that were skipped
+    tables['texts'] = tables['texts'].set_index('text').reindex(list(text_names(textFiles).values())).reset_index()
+    tables['texts'] = tables['texts'].astype({'words': 'Int64', 'missing_words': 'Int64'})
+    tables['texts'].insert(1, 'condition', tables['texts']['text'].map(conditionOf).fillna('all'))
+    tables['texts'].insert(2, 'status', tables['texts']['text'].map(skipped).fillna('ok'))
+
+    tables['texts'].to_csv(report_file, sep='\t', index=False, lineterminator='\n')
+    tables['conditions'].to_csv(f'{report_file[:-4]}_conditions.txt', sep='\t', index=False, lineterminator='\n')
+    tables['balance'].to_csv(f'{report_file[:-4]}_balance.txt', sep='\t', index=False, lineterminator='\n')
+
+    return tables
@@ -0,0 +1,125 @@
+'''
+Sentence store for incremental re-analysis of edited texts.
+
+analyze_text_FLEXIKON(..., incremental=True) and analyze_text_NLP(...,
+incremental=True) keep the result of every sentence of a text in a
+{textname}_sentences_{version}.pkl file next to the output files, keyed by a
+hash of the sentence. When the edited text is analyzed again, only sentences
+whose hash is not in the store are analyzed; results of all other sentences are
+reused, and the output files are written from the results of all sentences as
+usual. The store is discarded when a reference file changes.
+
+Sentences are split with the shared tokenizer (tokenizer.py).
+'''
+
+# raised whenever the format of stored sentence results changes
+storeVersion = 1
+
+
+def split_sentences(text):
+    """
+    Parameters
+    ----------
+    text : str
+
+    Returns
+    -------
+    list of (sentence text, words) tuples, one per sentence with words (tokenizer.tokenize()).
+    Sentence texts run from the first word of a sentence to the first word of the next one,
+    so joined together they give back the text (text before the first word is added
+    to the first sentence).
+    """
+
+    from tokenizer import tokenize
+
+    starts = []
+    sentenceWords = []
+    for word, sentence, start, _ in tokenize(text):
+        if sentence == len(starts):
+            starts.append(start)
+            sentenceWords.append([])
+        sentenceWords[-1].append(word)
+
+    if starts:
+        starts[0] = 0
+    ends = starts[1:] + [len(text)]
+
+    return [(text[start:end], words) for start, end, words in zip(starts, ends, sentenceWords)]
+
+
+def sentence_key(value):
+    """
+    Hash of a sentence: its text, or its list of words.
+    """
+
+    import hashlib
+
+    if not isinstance(value, str):
+        value = '\n'.join(value)
+
+    return hashlib.sha1(value.encode('utf-8')).hexdigest()
+
+
+def _reference_keys(reference_files):
+
+    from reference_cache import _source_key
+
+    return [_source_key(file) for file in reference_files]
+
+
+def load_sentences(store_file, reference_files):
+    """
+    Parameters
+    ----------
+    store_file : str
+        {textname}_sentences_{version}.pkl
+    reference_files : list of str
+        reference files the stored results were computed with
+
+    Returns
+    -------
+    dict
+        {sentence key: stored result}; empty if there is no store yet,
+        or if it was made with another version or other (or changed) reference files.
+    """
+
+    import pickle
+
+    try:
+        with open(store_file, 'rb') as file:
+            store = pickle.load(file)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return {}
+
+    if store.get('version') != storeVersion or store.get('references') != _reference_keys(reference_files):
+        return {}
+
+    return store['sentences']
+
+
+def save_sentences(store_file, reference_files, sentences):
+    """
+    Parameters
+    ----------
+    store_file : str
+    reference_files : list of str
+    sentences : dict
+        {sentence key: result} of the sentences of the current text only,
+        so results of deleted sentences do not accumulate.
+
+    Returns
+    -------
+    store file, replaced in one step so an interrupted run never leaves a broken store.
+    """
+
+    import os
+    import pickle
+
+    store = {'version': storeVersion,
+             'references': _reference_keys(reference_files),
+             'sentences': sentences}
+
+    temporaryFile = f'{store_file}.tmp'
+    with open(temporaryFile, 'wb') as file:
+        pickle.dump(store, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporaryFile, store_file)
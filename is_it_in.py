@@ -3,14 +3,24 @@ Usage in IPython:
 from is_it_in import isitin as isin
 isin("hus")
 
+from is_it_in import lookup, prefix_search
+lookup(["hus", "huse"])
+prefix_search("hus")
+
 Simple function to check if words are included in flexikon or corpus files.
 
+Reference files are loaded on first lookup, not on import. To load them in advance,
+or to use other reference files:
+from is_it_in import preload
+preload('flexikon_rows.txt','lemma-10k-2017-in.txt','lemma-30k-2017.txt')
+
 Aleksandra Kaszowska, 09/10/2023
 '''
 
-global flexikon
-global corpus
-global othercorpus
+# reference files loaded by default on first lookup
+defaultReferenceFiles = ('flexikon_rows.txt','lemma-10k-2017-in.txt','lemma-30k-2017.txt')
+
+_references = {}
 
 def load_all(flexikon_rows_file,corpus_file,other_corpus_file):
     """
@@ -31,80 +41,182 @@ def load_all(flexikon_rows_file,corpus_file,other_corpus_file):
     
     Function
     -------
+    Parsed reference files are cached on disk (reference_cache.py), 
+    so only the first call after a reference file changes reads the text files.
     
     @AUTHOR: Aleksandra Kaszowska, 09/10/2023
     """
-    import pandas as pd
+    from lexicon_index import load_flexikon, load_corpus
     
-    corpus = pd.read_csv(
-        corpus_file, 
-        sep='\t', 
-        header=None, 
-        names=['part_of_speech_tag','lemma','relative_frequency']
-        )
-    
-    corpusRecodeDict = {'A':'ADJECTIVE',
-                      'C':'CONJUNCTION',
-                      'D':'ADVERB',
-                      'I':'INTERJECTION',
-                      'L':'NUMERAL',
-                      'NC':'NOUN',
-                      'NP':'PROPER_NOUN',
-                      'P':'PRONOUN',
-                      'T':'PREPOSITION',
-                      'V':'VERB',
-                      'U':'UNIQUE',
-                      'NW':'POW_NOUN',
-                      'LW':'POW_NUMERAL',
-                      'M':'POW_MORPH_ITEM',
-                      'EW':'POW_LEX_ITEM',
-                      'AW':'NO_IDEA',
-                      'DW':'NO_IDEA',
-                      'TW':'NO_IDEA',
-                      'PW':'NO_IDEA',
-                      'IW':'NO_IDEA',
-                      'VW':'NO_IDEA'}  
-    
-    corpus = corpus.assign(part_of_speech = corpus.part_of_speech_tag.map(corpusRecodeDict))
-    
-    ###
-    
-    flexikon = pd.read_csv(
-        flexikon_rows_file, 
-        sep='\t', 
-        header=None, 
-        names=['part_of_speech_tag','lemma','conjugation']
-        )
-    
-    flexikonRecodeDict = {'S':'NOUN',
-                        'A':'ADJECTIVE',
-                        'V':'VERB',
-                        'D':'ADVERB',
-                        'F':'ABBREVIATION',
-                        'K':'CONJUNCTION',
-                        'L':'ONOMATOPEIC_WORD',
-                        'O':'PRONOUN',
-                        'P':'PROPER_NOUN',
-                        'I':'PREFIX',
-                        'Æ':'PREPOSITION',
-                        'T':'NUMERAL',
-                        'U':'INTERJECTION',
-                        'X':'UNIDENTIFIED'}  
-    
-    flexikon = flexikon.assign(part_of_speech = flexikon.part_of_speech_tag.map(flexikonRecodeDict))
-
-    othercorpus = pd.read_csv(
-        other_corpus_file, 
-        sep='\t', 
-        header=None, 
-        names=['part_of_speech_tag','lemma','relative_frequency']
-        )
-    
-    othercorpus = othercorpus.assign(part_of_speech = othercorpus.part_of_speech_tag.map(corpusRecodeDict))    
+    corpus = load_corpus(corpus_file)
+    flexikon = load_flexikon(flexikon_rows_file)
+    othercorpus = load_corpus(other_corpus_file)
 
     return flexikon, corpus, othercorpus
 
-flexikon, corpus, othercorpus = load_all('flexikon_rows.txt','lemma-10k-2017-in.txt','lemma-30k-2017.txt')
+
+def preload(flexikon_rows_file=defaultReferenceFiles[0],corpus_file=defaultReferenceFiles[1],other_corpus_file=defaultReferenceFiles[2],
+            lexicon_file=None,other_lexicon_file=None,index=None):
+    """
+    Parameters
+    ----------
+    as load_all(); defaults to flexikon_rows.txt, lemma-10k-2017-in.txt and lemma-30k-2017.txt
+    lexicon_file : str, optional
+        compiled lexicon of flexikon_rows_file and corpus_file (compiled_lexicon.py), 
+        read instead of the reference files
+    other_lexicon_file : str, optional
+        compiled lexicon containing other_corpus_file, read instead of other_corpus_file
+    index : dict, optional
+        index of flexikon_rows_file and corpus_file already loaded (lexicon_index.build_lexicon_index() 
+        or compiled_lexicon.open_lexicon()), used instead of loading them again; 
+        also used for other_corpus_file if it is corpus_file
+
+    Returns
+    -------
+    None
+    
+    Function
+    -------
+    Builds dictionary indexes of reference files used by lookup() and isitin(): flexikon 
+    by inflectional form, corpus and othercorpus by lemma (lexicon_index.py).
+    Called automatically on first lookup with default files; call it directly to load 
+    references before the first lookup, or to switch to other reference files.
+    
+    Examples
+    --------
+    preload(lexicon_file="lexicon-10k.lex", other_lexicon_file="lemma-30k.lex")
+    """
+    
+    from lexicon_index import build_lexicon_index, build_corpus_index
+    from compiled_lexicon import open_lexicon
+    
+    if index is not None:
+        pass
+    elif lexicon_file is not None:
+        index = open_lexicon(lexicon_file)
+    else:
+        index = build_lexicon_index(flexikon_rows_file, corpus_file)
+    
+    if other_lexicon_file is not None:
+        otherIndex = open_lexicon(other_lexicon_file)['lemmas']
+    elif other_corpus_file == corpus_file:
+        otherIndex = index['lemmas']
+    else:
+        otherIndex = build_corpus_index(other_corpus_file)
+    
+    _references.clear()
+    _references['files'] = (flexikon_rows_file, corpus_file, other_corpus_file)
+    _references['indexes'] = {'flexikon': index['forms'],
+                              'corpus': index['lemmas'],
+                              'othercorpus': otherIndex}
+
+
+def _get_indexes():
+    
+    if not _references:
+        preload()
+    
+    return _references['indexes']
+
+
+def __getattr__(name):
+    # is_it_in.flexikon, is_it_in.corpus and is_it_in.othercorpus dataframes are loaded on first access
+    if name in ('flexikon', 'corpus', 'othercorpus'):
+        _get_indexes()
+        if 'frames' not in _references:
+            _references['frames'] = dict(zip(('flexikon', 'corpus', 'othercorpus'), load_all(*_references['files'])))
+        return _references['frames'][name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+flexikonColumns = ('part_of_speech_tag', 'lemma', 'conjugation', 'part_of_speech')
+corpusColumns = ('part_of_speech_tag', 'lemma', 'relative_frequency', 'part_of_speech')
+
+
+def lookup(words):
+    """
+    Parameters
+    ----------
+    words : str or list of str
+        word, or list of words, to look up
+    
+    Returns
+    -------
+    dict (for one word) or list of dict (for list of words)
+        'word': word looked up
+        'flexikon': flexikon rows where word is inflectional form (conjugation)
+        'corpus', 'othercorpus': corpus rows where word is lemma
+        rows are dicts with column names of the reference files as keys
+    
+    Function
+    -------
+    Checks if words are included in flexikon or corpus files, with dictionary lookups.
+    
+    Examples
+    --------
+    lookup("huse")['flexikon']
+    [{'part_of_speech_tag': 'S', 'lemma': 'hus', 'conjugation': 'huse', 'part_of_speech': 'NOUN'}]
+    [result['word'] for result in lookup(["hus", "huse", "hussen"]) if not result['corpus']]
+    """
+    
+    indexes = _get_indexes()
+    
+    def lookup_word(word):
+        return {'word': word,
+                'flexikon': [dict(zip(flexikonColumns, row)) for row in indexes['flexikon'].get(word, [])],
+                'corpus': [dict(zip(corpusColumns, row)) for row in indexes['corpus'].get(word, [])],
+                'othercorpus': [dict(zip(corpusColumns, row)) for row in indexes['othercorpus'].get(word, [])]}
+    
+    if isinstance(words, str):
+        return lookup_word(words)
+    
+    return [lookup_word(word) for word in words]
+
+
+def prefix_search(prefix, reference='flexikon', limit=None):
+    """
+    Parameters
+    ----------
+    prefix : str
+        beginning of word, e.g. 'hus'
+    reference : str, optional
+        'flexikon' (inflectional forms), 'corpus' or 'othercorpus' (lemmas)
+    limit : int, optional
+        return at most limit words
+    
+    Returns
+    -------
+    list of str
+        words in reference starting with prefix, in alphabetical order
+    
+    Function
+    -------
+    Binary search in a sorted list of all words of reference, built on first prefix search.
+    
+    Examples
+    --------
+    prefix_search("hus")
+    prefix_search("hus", reference='othercorpus', limit=20)
+    """
+    
+    from bisect import bisect_left
+    
+    indexes = _get_indexes()
+    sortedWords = _references.setdefault('sorted', {})
+    if reference not in sortedWords:
+        sortedWords[reference] = sorted(word for word in indexes[reference] if isinstance(word, str))
+    words = sortedWords[reference]
+    
+    found = []
+    position = bisect_left(words, prefix)
+    while position < len(words) and words[position].startswith(prefix):
+        if limit is not None and len(found) >= limit:
+            break
+        found.append(words[position])
+        position += 1
+    
+    return found
+
 
 def isitin(word):
     """
@@ -118,13 +230,18 @@ def isitin(word):
     
     Function
     -------
+    Prints results of lookup(word); use lookup() to get results instead of printing them.
     
     @AUTHOR: Aleksandra Kaszowska, 09/10/2023
     """
     
-    a = flexikon.loc[flexikon['conjugation'] == word]
-    b = corpus.loc[corpus['lemma'] == word]
-    c = othercorpus.loc[othercorpus['lemma'] == word]
+    import pandas as pd
+    
+    result = lookup(word)
+    
+    a = pd.DataFrame(result['flexikon'], columns=flexikonColumns)
+    b = pd.DataFrame(result['corpus'], columns=corpusColumns)
+    c = pd.DataFrame(result['othercorpus'], columns=corpusColumns)
     
     if len(a) == 0:
         print(f'\n\nFLEXIKON does not contain word {word}')
@@ -0,0 +1,394 @@
+'''
+Lexicon index shared by the text analysis pipelines.
+
+Flexikon and corpus reference files are read once and indexed as dictionaries:
+inflectional form -> flexikon rows, and lemma -> corpus rows. Each word from a
+target text is then resolved with a few dictionary lookups, instead of scanning
+the full flexikon and corpus tables for every word.
+
+Usage in IPython:
+from lexicon_index import build_lexicon_index
+index = build_lexicon_index('flexikon_rows.txt', 'lemma-30k-2017.txt')
+index['forms']['huse']
+'''
+
+corpusRecodeDict = {'A':'ADJECTIVE',
+                  'C':'CONJUNCTION',
+                  'D':'ADVERB',
+                  'I':'INTERJECTION',
+                  'L':'NUMERAL',
+                  'NC':'NOUN',
+                  'NP':'PROPER_NOUN',
+                  'P':'PRONOUN',
+                  'T':'PREPOSITION',
+                  'V':'VERB',
+                  'U':'UNIQUE',
+                  'NW':'POW_NOUN',
+                  'LW':'POW_NUMERAL',
+                  'M':'POW_MORPH_ITEM',
+                  'EW':'POW_LEX_ITEM',
+                  'AW':'NO_IDEA',
+                  'DW':'NO_IDEA',
+                  'TW':'NO_IDEA',
+                  'PW':'NO_IDEA',
+                  'IW':'NO_IDEA',
+                  'VW':'NO_IDEA'}
+
+flexikonRecodeDict = {'S':'NOUN',
+                    'A':'ADJECTIVE',
+                    'V':'VERB',
+                    'D':'ADVERB',
+                    'F':'ABBREVIATION',
+                    'K':'CONJUNCTION',
+                    'L':'ONOMATOPEIC_WORD',
+                    'O':'PRONOUN',
+                    'P':'PROPER_NOUN',
+                    'I':'PREFIX',
+                    'Æ':'PREPOSITION',
+                    'T':'NUMERAL',
+                    'U':'INTERJECTION',
+                    'X':'UNIDENTIFIED'}
+
+# number of resolved words kept in word cache of a lexicon index (see resolve_word())
+wordCacheSize = 100000
+
+
+def load_corpus(corpus_file, cache=True):
+    """
+    Parameters
+    ----------
+    corpus_file : str: 'filename.txt'
+        Corpus file containing lemmas and their relative frequency.
+        https://korpus.dsl.dk/resources/details/freq-lemmas.html
+    cache : bool, optional
+        use parsed copy from reference_cache.py while corpus file is unchanged
+
+    Returns
+    -------
+    dataframe with columns part_of_speech_tag, lemma, relative_frequency, part_of_speech
+    """
+
+    from reference_cache import cached_reference
+
+    return cached_reference('corpus', [corpus_file], lambda: _read_corpus(corpus_file), cache)
+
+
+def _read_corpus(corpus_file):
+
+    import pandas as pd
+
+    corpus = pd.read_csv(
+        corpus_file,
+        sep='\t',
+        header=None,
+        names=['part_of_speech_tag','lemma','relative_frequency']
+        )
+
+    corpus = corpus.assign(part_of_speech = corpus.part_of_speech_tag.map(corpusRecodeDict))
+
+    return compact_table(corpus)
+
+
+def load_flexikon(flexikon_rows_file, cache=True):
+    """
+    Parameters
+    ----------
+    flexikon_rows_file : str: 'filename.txt'
+        Flexikon file formatted as rows using convert_flexikon().
+        https://korpus.dsl.dk/resources/details/flexikon.html
+    cache : bool, optional
+        use parsed copy from reference_cache.py while flexikon file is unchanged
+
+    Returns
+    -------
+    dataframe with columns part_of_speech_tag, lemma, conjugation, part_of_speech
+    """
+
+    from reference_cache import cached_reference
+
+    return cached_reference('flexikon', [flexikon_rows_file], lambda: _read_flexikon(flexikon_rows_file), cache)
+
+
+def _read_flexikon(flexikon_rows_file):
+
+    import pandas as pd
+
+    flexikon = pd.read_csv(
+        flexikon_rows_file,
+        sep='\t',
+        header=None,
+        names=['part_of_speech_tag','lemma','conjugation']
+        )
+
+    flexikon = flexikon.assign(part_of_speech = flexikon.part_of_speech_tag.map(flexikonRecodeDict))
+
+    return compact_table(flexikon)
+
+
+def compact_table(table):
+    """
+    Parameters
+    ----------
+    table : dataframe
+        flexikon or corpus table
+
+    Returns
+    -------
+    dataframe with the same columns and values, stored compactly: text columns in which 
+    values repeat (part of speech tags, recoded parts of speech, flexikon lemmas) become 
+    categorical, so each distinct string is stored once and rows hold small integer codes.
+    Columns of mostly unique strings (flexikon conjugations, corpus lemmas) are kept as they are.
+
+    Function
+    -------
+    Used by load_flexikon() and load_corpus(). Relative frequencies are kept as float64: 
+    they are written to output files, and float32 would change the written values.
+    """
+
+    import pandas as pd
+
+    compact = {}
+    for column in table.columns:
+        values = table[column]
+        if not pd.api.types.is_numeric_dtype(values) and not isinstance(values.dtype, pd.CategoricalDtype):
+            if values.nunique() <= len(values) // 2:
+                values = values.astype('category')
+        compact[column] = values
+
+    return pd.DataFrame(compact, index=table.index)
+
+
+def memory_report(flexikon_rows_file, corpus_file):
+    """
+    Parameters
+    ----------
+    flexikon_rows_file : str: 'filename.txt'
+    corpus_file : str: 'filename.txt'
+
+    Returns
+    -------
+    dict
+        {table name: (bytes as read from file, bytes after compact_table())}
+        and prints memory footprint of both tables before and after.
+
+    Examples
+    --------
+    memory_report("flexikon_rows.txt", "lemma-30k-2017.txt")
+    """
+
+    import pandas as pd
+
+    report = {}
+    for name, file, names, recodeDict in (
+            ('flexikon', flexikon_rows_file, ['part_of_speech_tag','lemma','conjugation'], flexikonRecodeDict),
+            ('corpus', corpus_file, ['part_of_speech_tag','lemma','relative_frequency'], corpusRecodeDict)):
+        table = pd.read_csv(file, sep='\t', header=None, names=names, dtype={'part_of_speech_tag': object,
+                                                                              'lemma': object, 'conjugation': object})
+        table = table.assign(part_of_speech = table.part_of_speech_tag.map(recodeDict))
+
+        before = int(table.memory_usage(deep=True).sum())
+        after = int(compact_table(table).memory_usage(deep=True).sum())
+        report[name] = (before, after)
+        print(f'{name}: {before / 1024**2:.1f} MB as read, {after / 1024**2:.1f} MB compact ({after / before:.0%})')
+
+    return report
+
+
+def _group_rows(table, key):
+    """
+    Group rows of a dataframe into a dictionary {key value: [row tuples]}.
+    Row order within each group follows the order of the reference file.
+    Missing values are stored as None, so that rows with missing keys are
+    grouped together (as they are when pandas merges on that key).
+    """
+
+    table = table.astype(object).where(table.notna(), None)
+
+    groups = {}
+    keyPosition = list(table.columns).index(key)
+    for row in table.itertuples(index=False, name=None):
+        groups.setdefault(row[keyPosition], []).append(row)
+
+    return groups
+
+
+def build_corpus_index(corpus_file, cache=True):
+    """
+    Parameters
+    ----------
+    corpus_file : str: 'filename.txt'
+        Corpus file containing lemmas and their relative frequency.
+        https://korpus.dsl.dk/resources/details/freq-lemmas.html
+    cache : bool, optional
+        use index saved by reference_cache.py while corpus file is unchanged
+
+    Returns
+    -------
+    dict
+        {lemma: [(part_of_speech_tag, lemma, relative_frequency, part_of_speech), ...]}
+    """
+
+    from reference_cache import cached_reference
+
+    return cached_reference('corpus_index', [corpus_file],
+                            lambda: _group_rows(load_corpus(corpus_file, cache=False), 'lemma'), cache)
+
+
+def build_lexicon_index(flexikon_rows_file, corpus_file, cache=True):
+    """
+    Parameters
+    ----------
+    flexikon_rows_file : str: 'filename.txt'
+        Flexikon file formatted as rows using convert_flexikon().
+        https://korpus.dsl.dk/resources/details/flexikon.html
+    corpus_file : str: 'filename.txt'
+        Corpus file containing lemmas and their relative frequency.
+        https://korpus.dsl.dk/resources/details/freq-lemmas.html
+    cache : bool, optional
+        use index saved by reference_cache.py while both reference files are unchanged
+
+    Returns
+    -------
+    dict
+        'forms': {conjugation: [(part_of_speech_tag, lemma, conjugation, part_of_speech), ...]}
+        'lemmas': {lemma: [(part_of_speech_tag, lemma, relative_frequency, part_of_speech), ...]}
+        'flexikon', 'corpus': dataframes from load_flexikon() and load_corpus()
+        'flexikon_rows_file', 'corpus_file': reference files the index was built from
+
+    Function
+    -------
+    Builds dictionary index of flexikon (by inflectional form) and corpus (by lemma).
+    The index is built once and can be reused for any number of texts.
+    The index is also saved to disk, so the next run skips parsing reference files.
+
+    Examples
+    --------
+    index = build_lexicon_index("flexikon_rows.txt", "lemma-30k-2017.txt")
+    analyze_text_FLEXIKON("SAMPLE_TEXT.txt", "flexikon_rows.txt", "lemma-30k-2017.txt", lexicon_index=index)
+    """
+
+    from reference_cache import cached_reference
+
+    return cached_reference('lexicon_index', [flexikon_rows_file, corpus_file],
+                            lambda: _build_lexicon_index(flexikon_rows_file, corpus_file), cache)
+
+
+def _build_lexicon_index(flexikon_rows_file, corpus_file):
+
+    flexikon = load_flexikon(flexikon_rows_file, cache=False)
+    corpus = load_corpus(corpus_file, cache=False)
+
+    return {'forms': _group_rows(flexikon, 'conjugation'),
+            'lemmas': _group_rows(corpus, 'lemma'),
+            'flexikon': flexikon,
+            'corpus': corpus,
+            'flexikon_rows_file': flexikon_rows_file,
+            'corpus_file': corpus_file}
+
+
+def frequency_rows(index, word):
+    """
+    Parameters
+    ----------
+    index : dict
+        lexicon index from build_lexicon_index()
+    word : str
+        inflectional form, lowercase
+
+    Returns
+    -------
+    list of (lemma, conjugation, part_of_speech, relative_frequency) rows:
+    every flexikon lemma of the word, combined with every corpus entry for that lemma.
+    Empty list if none of the lemmas are in corpus.
+    """
+
+    rows = []
+    for _, lemma, conjugation, _ in index['forms'].get(word, []):
+        for _, _, relativeFrequency, partOfSpeech in index['lemmas'].get(lemma, []):
+            rows.append((lemma, conjugation, partOfSpeech, relativeFrequency))
+
+    return rows
+
+
+def new_word_cache(maxsize=wordCacheSize):
+    """
+    Parameters
+    ----------
+    maxsize : int, optional
+        number of words kept; least recently used words are dropped first
+
+    Returns
+    -------
+    dict
+        empty word cache with hit/miss counters. To change cache size of an index:
+        index['word_cache'] = new_word_cache(1000)
+    """
+
+    from collections import OrderedDict
+
+    return {'entries': OrderedDict(), 'maxsize': maxsize, 'hits': 0, 'misses': 0}
+
+
+def resolve_word(index, word):
+    """
+    Parameters
+    ----------
+    index : dict
+        lexicon index from build_lexicon_index()
+    word : str
+        word from text, lowercase
+
+    Returns
+    -------
+    tuple (kind, rows)
+        ('identified', frequency_rows(index, word)) if word is in flexikon 
+            (or both word and capitalized word are lemmas in corpus);
+        ('corpus', rows) if only word or only capitalized word is a lemma in corpus; 
+            rows are (lemma, lemma in lowercase, part_of_speech, relative_frequency);
+        ('missing', []) if word is in neither flexikon nor corpus.
+
+    Function
+    -------
+    Resolves word as analyze_text_FLEXIKON() does. Results are kept in a bounded 
+    least recently used cache stored with the index (index['word_cache']), so frequent 
+    words are resolved once per session, across all texts analyzed with the same index.
+    """
+
+    cache = index.get('word_cache')
+    if cache is None:
+        cache = index['word_cache'] = new_word_cache()
+
+    entries = cache['entries']
+    resolved = entries.get(word)
+    if resolved is not None:
+        cache['hits'] += 1
+        try:
+            entries.move_to_end(word)
+        except KeyError:
+            # dropped by another thread sharing the index (lookup_server.py)
+            pass
+        return resolved
+
+    cache['misses'] += 1
+
+    a = index['forms'].get(word, [])
+    c = index['lemmas'].get(word.capitalize(), [])
+    d = index['lemmas'].get(word, [])
+
+    if len(a) == 0 and len(c) == 0 and len(d) == 0:
+        resolved = ('missing', [])
+    elif len(a) == 0 and (len(c) == 0) != (len(d) == 0):
+        # for words directly from corpus, lemma = conjugation
+        resolved = ('corpus', [(lemma, lemma.lower() if isinstance(lemma, str) else lemma, partOfSpeech, relativeFrequency)
+                               for _, lemma, relativeFrequency, partOfSpeech in (c or d)])
+    else:
+        resolved = ('identified', frequency_rows(index, word))
+
+    entries[word] = resolved
+    if len(entries) > cache['maxsize']:
+        try:
+            entries.popitem(last=False)
+        except KeyError:
+            pass
+
+    return resolved
@@ -0,0 +1,309 @@
+'''
+Local HTTP server answering word lookups, LIX scoring and text analyses.
+
+Reference files (and, for NLP analyses, the spacy model) are loaded once when
+the server starts and kept in memory, so each request only pays for its own
+computation. Requests are handled in parallel threads; NLP analyses share one
+spacy model and are run one at a time.
+
+Endpoints (all responses are JSON):
+GET  /status                             reference files and word cache counters
+GET  /lookup?word=hus&word=huse          is_it_in.lookup() of each word
+GET  /prefix?prefix=hus&limit=20         is_it_in.prefix_search()
+POST /lix                                LIX of posted text
+POST /analyze/flexikon?mode=lookup       analyze_text_FLEXIKON() of posted text
+POST /analyze/nlp                        analyze_text_NLP() of posted text
+
+Posted text is sent as the request body, encoded as utf-8.
+
+Usage from command line:
+python lookup_server.py --port 8765 --flexikon flexikon_rows.txt --corpus lemma-30k-2017.txt
+python lookup_server.py --corpus lemma-30k-2017.txt --lookup-corpus lemma-10k-2017-in.txt --other-corpus lemma-30k-2017.txt
+
+curl "http://localhost:8765/lookup?word=huse"
+curl --data-binary @SAMPLE_TEXT.txt http://localhost:8765/analyze/flexikon
+'''
+
+
+def load_server_state(flexikon_rows_file='flexikon_rows.txt', corpus_file='lemma-30k-2017.txt',
+                      lookup_corpus_file=None, other_corpus_file=None, nlp=True):
+    """
+    Parameters
+    ----------
+    flexikon_rows_file : str: 'filename.txt'
+        Flexikon file formatted as rows using convert_flexikon(), used for FLEXIKON analyses.
+    corpus_file : str: 'filename.txt'
+        Corpus file used for FLEXIKON and NLP analyses.
+    lookup_corpus_file : str, optional
+        corpus for lookups ('corpus' of is_it_in.lookup()); corpus_file if None.
+    other_corpus_file : str, optional
+        second corpus for lookups ('othercorpus' of is_it_in.lookup()); lookup_corpus_file if None.
+    nlp : bool, optional
+        load spacy model for /analyze/nlp (requires spacy and da_core_news_md).
+
+    Returns
+    -------
+    dict
+        reference data shared by all requests.
+
+    Function
+    -------
+    Lookups use the flexikon index loaded for analyses (and its corpus, unless another
+    lookup corpus is given), so only corpora that differ from corpus_file are loaded again.
+    """
+
+    import threading
+    import is_it_in
+    from lexicon_index import build_lexicon_index, build_corpus_index
+    from analyze_text_NLP import load_nlp_model
+
+    index = build_lexicon_index(flexikon_rows_file, corpus_file)
+
+    if lookup_corpus_file is None or lookup_corpus_file == corpus_file:
+        lookup_corpus_file, lookupIndex = corpus_file, index
+    else:
+        lookupIndex = {'forms': index['forms'], 'lemmas': build_corpus_index(lookup_corpus_file)}
+    if other_corpus_file is None:
+        other_corpus_file = lookup_corpus_file
+
+    is_it_in.preload(flexikon_rows_file, lookup_corpus_file, other_corpus_file, index=lookupIndex)
+
+    return {'flexikon_rows_file': flexikon_rows_file,
+            'corpus_file': corpus_file,
+            'index': index,
+            'lookup_files': [flexikon_rows_file, lookup_corpus_file, other_corpus_file],
+            'nlp': load_nlp_model() if nlp else None,
+            'nlp_lock': threading.Lock()}
+
+
+def _read_output(written):
+    """
+    Identified rows and missing words of an analysis, read back from its output files.
+    """
+
+    import csv
+
+    with open(written['identified_file'], 'r', encoding='utf-8', newline='') as file:
+        identified = list(csv.DictReader(file, delimiter='\t'))
+    for row in identified:
+        frequency = row.get('relative_frequency')
+        row['relative_frequency'] = float(frequency) if frequency else None
+
+    with open(written['missing_file'], 'r') as file:
+        missing = [line.rstrip('\n') for line in file]
+
+    return {'identified_rows': written['identified_rows'],
+            'missing_words': written['missing_words'],
+            'identified': identified,
+            'missing': missing}
+
+
+def analyze_posted_text(state, text, version, mode='lookup'):
+    """
+    Parameters
+    ----------
+    state : dict
+        from load_server_state()
+    text : str
+        text to analyze
+    version : str
+        'FLEXIKON' or 'NLP'
+    mode : str, optional
+        'lookup' or 'merge', FLEXIKON only (see analyze_text_FLEXIKON())
+
+    Returns
+    -------
+    dict
+        'identified_rows', 'missing_words': numbers of rows/words
+        'identified': identified rows as dicts, 'missing': missing words;
+        as written to output files by the pipelines.
+
+    Function
+    -------
+    Runs the pipeline on the text in a temporary folder, with reference data from state.
+    """
+
+    import os
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as folder:
+        text_file = os.path.join(folder, 'text.txt')
+        with open(text_file, 'w', encoding='utf-8') as file:
+            file.write(text)
+
+        if version == 'FLEXIKON':
+            from analyze_text_FLEXIKON import analyze_text_FLEXIKON
+            written = analyze_text_FLEXIKON(text_file, state['flexikon_rows_file'], state['corpus_file'],
+                                            lexicon_index=state['index'], mode=mode)
+        elif version == 'NLP':
+            if state['nlp'] is None:
+                raise ValueError('server was started without spacy model')
+            from analyze_text_NLP import analyze_text_NLP
+            with state['nlp_lock']:
+                written = analyze_text_NLP(text_file, state['corpus_file'], nlp=state['nlp'],
+                                           corpus_index=state['index']['lemmas'])
+        else:
+            raise ValueError(f"version must be 'FLEXIKON' or 'NLP', not {version!r}")
+
+        return _read_output(written)
+
+
+def _status(state):
+
+    cache = state['index'].get('word_cache', {})
+
+    return {'flexikon_rows_file': state['flexikon_rows_file'],
+            'corpus_file': state['corpus_file'],
+            'lookup_files': state['lookup_files'],
+            'nlp': state['nlp'] is not None,
+            'word_cache': {'words': len(cache.get('entries', ())),
+                           'hits': cache.get('hits', 0),
+                           'misses': cache.get('misses', 0)}}
+
+
+def _lix(text):
+
+    from LIX import lix_counts, lix_score
+
+    sentences, words, longWords = lix_counts([text])
+
+    return {'sentences': sentences,
+            'words': words,
+            'long_words': longWords,
+            'lix': lix_score(sentences, words, longWords) if words > 0 else None}
+
+
+def _answer(state, method, path, query, body):
+    """
+    Returns (HTTP status, JSON-serializable answer) for one request.
+    """
+
+    import is_it_in
+
+    if method == 'GET' and path == '/status':
+        return 200, _status(state)
+
+    if method == 'GET' and path == '/lookup':
+        return 200, is_it_in.lookup(query.get('word', []))
+
+    if method == 'GET' and path == '/prefix':
+        limit = query.get('limit')
+        return 200, is_it_in.prefix_search(query.get('prefix', [''])[0],
+                                           reference=query.get('reference', ['flexikon'])[0],
+                                           limit=int(limit[0]) if limit else None)
+
+    if method == 'POST' and path == '/lix':
+        return 200, _lix(body)
+
+    if method == 'POST' and path == '/analyze/flexikon':
+        return 200, analyze_posted_text(state, body, 'FLEXIKON', mode=query.get('mode', ['lookup'])[0])
+
+    if method == 'POST' and path == '/analyze/nlp':
+        return 200, analyze_posted_text(state, body, 'NLP')
+
+    return 404, {'error': f'no endpoint {method} {path}'}
+
+
+def make_server(state, host='127.0.0.1', port=8765):
+    """
+    Parameters
+    ----------
+    state : dict
+        from load_server_state()
+    host : str, optional
+        address to listen on; the default only accepts connections from this computer
+    port : int, optional
+        port to listen on (0: any free port, see server.server_address)
+
+    Returns
+    -------
+    http.server.ThreadingHTTPServer
+        call serve_forever() to start answering requests, shutdown() to stop.
+    """
+
+    import json
+    from urllib.parse import urlsplit, parse_qs
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def _handle(self, method):
+            url = urlsplit(self.path)
+            body = ''
+            if method == 'POST':
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length).decode('utf-8')
+
+            try:
+                status, answer = _answer(state, method, url.path, parse_qs(url.query), body)
+            except (ValueError, KeyError, UnicodeDecodeError) as error:
+                status, answer = 400, {'error': f'{type(error).__name__}: {error}'}
+            except Exception as error:
+                status, answer = 500, {'error': f'{type(error).__name__}: {error}'}
+
+            data = json.dumps(answer, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            self._handle('GET')
+
+        def do_POST(self):
+            self._handle('POST')
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+
+    return server
+
+
+def serve(host='127.0.0.1', port=8765, **reference_files):
+    """
+    Parameters
+    ----------
+    host, port : see make_server()
+    **reference_files : see load_server_state()
+
+    Returns
+    -------
+    runs until interrupted (Ctrl+C).
+
+    Examples
+    --------
+    serve(port=8765, flexikon_rows_file="flexikon_rows.txt", corpus_file="lemma-30k-2017.txt", nlp=False)
+    """
+
+    state = load_server_state(**reference_files)
+    server = make_server(state, host, port)
+    print(f'serving on http://{server.server_address[0]}:{server.server_address[1]}')
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve word lookups, LIX and text analyses over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--flexikon', default='flexikon_rows.txt', help='flexikon rows file')
+    parser.add_argument('--corpus', default='lemma-30k-2017.txt', help='corpus file for analyses')
+    parser.add_argument('--lookup-corpus', default=None, help='corpus file for lookups (default: --corpus)')
+    parser.add_argument('--other-corpus', default=None, help='second corpus file for lookups (default: --lookup-corpus)')
+    parser.add_argument('--no-nlp', action='store_true', help='do not load spacy model (no /analyze/nlp)')
+    args = parser.parse_args()
+
+    serve(args.host, args.port, flexikon_rows_file=args.flexikon, corpus_file=args.corpus,
+          lookup_corpus_file=args.lookup_corpus, other_corpus_file=args.other_corpus, nlp=not args.no_nlp)
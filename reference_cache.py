@@ -0,0 +1,85 @@
+'''
+On-disk cache of parsed reference files (flexikon, corpus).
+
+Parsed tables and indexes are pickled to a .reference_cache folder next to the
+reference file, together with path, size and modification time of every source
+file. A cached copy is used only while all source files are unchanged; otherwise
+it is rebuilt and saved again. Delete the .reference_cache folder to clear it.
+'''
+
+cacheFolder = '.reference_cache'
+# raised whenever the format of cached tables changes, so older caches are rebuilt
+cacheVersion = 2
+
+
+def _source_key(path):
+    import os
+
+    stat = os.stat(path)
+
+    return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+def cached_reference(name, source_files, build, cache=True):
+    """
+    Parameters
+    ----------
+    name : str
+        name of cached object, e.g. 'corpus' or 'lexicon_index'
+    source_files : list of str
+        reference files the object is built from
+    build : function
+        function without arguments, building the object from source files
+    cache : bool, optional
+        if False, object is always built and nothing is saved
+
+    Returns
+    -------
+    object returned by build(), or its cached copy if source files did not change
+
+    Function
+    -------
+    Loads object from cache if available and up to date; otherwise builds it and
+    saves it to cache. If cache folder cannot be written, object is still returned.
+
+    Examples
+    --------
+    corpus = cached_reference('corpus', ['lemma-30k-2017.txt'], lambda: read_corpus('lemma-30k-2017.txt'))
+    """
+
+    import os
+    import pickle
+    import hashlib
+    import pandas as pd
+
+    if not cache:
+        return build()
+
+    sources = [_source_key(file) for file in source_files]
+    version = (cacheVersion, pd.__version__)
+
+    digest = hashlib.sha1(repr([source[0] for source in sources]).encode('utf-8')).hexdigest()[:12]
+    cacheDir = os.path.join(os.path.dirname(sources[0][0]), cacheFolder)
+    cacheFile = os.path.join(cacheDir, f'{name}-{digest}.pkl')
+
+    try:
+        with open(cacheFile, 'rb') as file:
+            stored = pickle.load(file)
+        if stored['version'] == version and stored['sources'] == sources:
+            return stored['data']
+    except Exception:
+        # missing, outdated or unreadable cache: rebuild below
+        pass
+
+    data = build()
+
+    try:
+        os.makedirs(cacheDir, exist_ok=True)
+        temporaryFile = f'{cacheFile}.{os.getpid()}.tmp'
+        with open(temporaryFile, 'wb') as file:
+            pickle.dump({'version': version, 'sources': sources, 'data': data}, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporaryFile, cacheFile)
+    except OSError:
+        pass
+
+    return data
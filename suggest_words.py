@@ -0,0 +1,214 @@
+'''
+Frequency-aware substitution suggestions for stimulus texts.
+
+For every word of a text whose lemma is less frequent than a threshold (or is
+not in the corpus at all), common lemmas of the same part of speech are suggested (most frequent first), each
+inflected to the form the original word has in its flexikon paradigm: a
+plural definite noun is replaced by plural definite forms, a past tense verb
+by past tense forms.
+
+Flexikon lists the forms of every lemma in a fixed order (see
+convert_flexikon()), so the position of a form within its lemma block is its
+slot in the paradigm. Homographs (e.g. two noun entries for 'ret') are separate
+blocks, each with its own paradigm. Paradigms and ranked candidates of every part of speech are
+computed once per lexicon index and threshold; suggestions for a whole text are
+then a single pass over its words.
+
+Usage in IPython:
+from suggest_words import suggest_substitutes
+suggest_substitutes('SAMPLE_TEXT.txt', 'flexikon_rows.txt', 'lemma-30k-2017.txt', threshold=1e-5)
+'''
+
+
+def build_suggestions(lexicon_index, threshold):
+    """
+    Parameters
+    ----------
+    lexicon_index : dict
+        index from lexicon_index.build_lexicon_index() (a compiled lexicon has no paradigms)
+    threshold : float
+        lowest relative frequency of a suggested lemma
+
+    Returns
+    -------
+    dict
+        'threshold': threshold
+        'paradigms': [forms in flexikon order] of every lemma block, by block number; a new block
+            starts wherever tag or lemma differ from the previous flexikon row
+        'blocks': {(part_of_speech_tag, lemma): [block numbers]}
+        'candidates': {(part_of_speech_tag, part_of_speech): [(lemma, relative_frequency), ...]},
+            flexikon lemmas with tag whose corpus frequency as the part of speech of the tag
+            (lexicon_index.flexikonRecodeDict) is at least threshold, most frequent first
+    """
+
+    from lexicon_index import flexikonRecodeDict
+
+    if 'flexikon' not in lexicon_index:
+        raise ValueError('suggestions need flexikon paradigms; use build_lexicon_index(), not a compiled lexicon')
+
+    flexikon = lexicon_index['flexikon'][['part_of_speech_tag','lemma','conjugation']].dropna().astype(str)
+    corpus = lexicon_index['corpus'][['lemma','relative_frequency','part_of_speech']].dropna()
+
+    paradigms = []
+    blocks = {}
+    previous = None
+    for tag, lemma, conjugation in flexikon.itertuples(index=False, name=None):
+        if (tag, lemma) != previous:
+            blocks.setdefault((tag, lemma), []).append(len(paradigms))
+            paradigms.append([])
+            previous = (tag, lemma)
+        paradigms[-1].append(conjugation)
+
+    candidates = flexikon[['part_of_speech_tag','lemma']].drop_duplicates()
+    candidates = candidates.merge(corpus.astype({'lemma': str, 'part_of_speech': str}), on='lemma')
+    candidates = candidates[(candidates['relative_frequency'] >= threshold) &
+                            (candidates['part_of_speech'] == candidates['part_of_speech_tag'].map(flexikonRecodeDict))]
+    candidates = candidates.sort_values(['relative_frequency','lemma'], ascending=[False, True], kind='stable')
+    candidates = candidates.drop_duplicates(['part_of_speech_tag','lemma','part_of_speech'])
+
+    ranked = {}
+    for tag, lemma, relativeFrequency, partOfSpeech in candidates.itertuples(index=False, name=None):
+        ranked.setdefault((tag, partOfSpeech), []).append((lemma, float(relativeFrequency)))
+
+    return {'threshold': threshold, 'paradigms': paradigms, 'blocks': blocks, 'candidates': ranked}
+
+
+def _paradigm(suggestions, tag, lemma, slot=None, conjugation=None):
+    """
+    Forms of the first block of lemma with tag that has a form in slot (or contains conjugation), or None.
+    """
+
+    for block in suggestions['blocks'].get((tag, lemma), []):
+        paradigm = suggestions['paradigms'][block]
+        if (slot is not None and slot < len(paradigm)) or (conjugation is not None and conjugation in paradigm):
+            return paradigm
+
+    return None
+
+
+def suggest_word(lexicon_index, suggestions, word, max_suggestions=5):
+    """
+    Parameters
+    ----------
+    lexicon_index : dict
+        index from lexicon_index.build_lexicon_index()
+    suggestions : dict
+        from build_suggestions() with the same index
+    word : str
+        lowercase word from text
+    max_suggestions : int, optional
+        number of suggestions for each reading of word
+
+    Returns
+    -------
+    list of dict, one per suggestion, for every reading (lemma, part of speech) of word
+    below the threshold: 'word', 'lemma', 'part_of_speech', 'relative_frequency', 'rank',
+    'suggested_lemma', 'suggested_word', 'suggested_relative_frequency'.
+    Every flexikon reading (lemma, tag) of word gets candidates of the same tag, ranked by their
+    frequency as the part of speech of the tag. A reading whose lemma is not in corpus as that
+    part of speech counts as below the threshold, and has no relative_frequency.
+    Empty list if word is common, or has no flexikon paradigm (missing or corpus only words).
+    """
+
+    from lexicon_index import resolve_word
+
+    kind, rows = resolve_word(lexicon_index, word)
+    if kind == 'missing' or any(frequency is not None and frequency >= suggestions['threshold']
+                                for _, _, _, frequency in rows):
+        return []
+
+    # flexikon tags, paradigm slots and parts of speech of every lemma of word
+    slots = {}
+    flexikonParts = {}
+    for tag, lemma, conjugation, partOfSpeech in lexicon_index['forms'].get(word, []):
+        paradigm = _paradigm(suggestions, tag, lemma, conjugation=conjugation)
+        if paradigm is not None:
+            slots.setdefault(lemma, {}).setdefault(tag, paradigm.index(conjugation))
+            flexikonParts.setdefault((lemma, tag), partOfSpeech)
+
+    # corpus frequency of every reading of word as the part of speech of its tag;
+    # readings not in corpus (the rarest words) have none
+    frequencies = {}
+    for lemma, _, partOfSpeech, relativeFrequency in rows:
+        frequencies.setdefault((lemma, partOfSpeech), relativeFrequency)
+
+    found = []
+    for (lemma, tag), partOfSpeech in flexikonParts.items():
+        slot = slots[lemma][tag]
+        relativeFrequency = frequencies.get((lemma, partOfSpeech))
+        rank = 0
+        for candidate, candidateFrequency in suggestions['candidates'].get((tag, partOfSpeech), []):
+            if rank == max_suggestions:
+                break
+            paradigm = _paradigm(suggestions, tag, candidate, slot=slot)
+            if candidate == lemma or paradigm is None:
+                continue
+            rank += 1
+            found.append({'word': word,
+                          'lemma': lemma,
+                          'part_of_speech': partOfSpeech,
+                          'relative_frequency': relativeFrequency,
+                          'rank': rank,
+                          'suggested_lemma': candidate,
+                          'suggested_word': paradigm[slot],
+                          'suggested_relative_frequency': candidateFrequency})
+
+    return found
+
+
+def suggest_substitutes(text_file,flexikon_rows_file,corpus_file,threshold,max_suggestions=5,lexicon_index=None):
+    """
+    Parameters
+    ----------
+    text_file : str: 'filename.txt'
+        .txt file containing text to check.
+    flexikon_rows_file : str: 'filename.txt'
+        Flexikon file formatted as rows using convert_flexikon().
+    corpus_file : str: 'filename.txt'
+        Corpus file containing lemmas and their relative frequency.
+    threshold : float
+        relative frequency below which words get suggestions, and above which lemmas are suggested.
+    max_suggestions : int, optional
+        number of suggestions for each reading of a word.
+    lexicon_index : dict, optional
+        index built with lexicon_index.build_lexicon_index() from the same reference files.
+
+    Returns
+    -------
+    {textname}_suggestions_FLEXIKON.txt: tab separated, one row per suggestion,
+    words in order of first appearance in text.
+    list of dict
+        suggestions, as suggest_word().
+
+    Function
+    -------
+    Suggests common replacements for rare words, to tune stimuli towards common words.
+    Words are split as in analyze_text_FLEXIKON() (tokenizer.py).
+
+    Examples
+    --------
+    suggest_substitutes("SAMPLE_TEXT.txt", "flexikon_rows.txt", "lemma-30k-2017.txt", threshold=1e-5)
+    """
+
+    import pandas as pd
+    from tokenizer import words
+    from lexicon_index import build_lexicon_index
+
+    if lexicon_index is None:
+        lexicon_index = build_lexicon_index(flexikon_rows_file, corpus_file)
+
+    suggestions = build_suggestions(lexicon_index, threshold)
+
+    with open(text_file, 'r', encoding='utf-8') as file_object:
+        wordList = words(file_object.read())
+
+    found = []
+    for word in dict.fromkeys(wordList):
+        found.extend(suggest_word(lexicon_index, suggestions, word, max_suggestions))
+
+    columns = ['word','lemma','part_of_speech','relative_frequency','rank',
+               'suggested_lemma','suggested_word','suggested_relative_frequency']
+    pd.DataFrame(found, columns=columns).to_csv(f'{text_file[:-4]}_suggestions_FLEXIKON.txt',
+                                                sep='\t', encoding='utf-8', index=False)
+
+    return found
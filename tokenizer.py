@@ -0,0 +1,149 @@
+'''
+Tokenizer shared by LIX, analyze_text_FLEXIKON and the annotation GUIs.
+
+Text is walked once with one precompiled pattern. Words are separated by
+whitespace and by . ! ? / |; punctuation inside a word is removed
+("1800-tallet" -> "1800tallet") and words are lowercased. Sentences end at
+. ! ? and at empty lines (paragraph breaks); sentences without words are not
+counted.
+
+Usage in IPython:
+from tokenizer import tokenize, words
+list(tokenize("Det er godt. Ja!"))
+words("Det er godt. Ja!")
+'''
+
+import re
+
+# a word: anything between separators; or a sentence end: . ! ? or an empty line
+_tokenPattern = re.compile(r'(?P<word>[^\s.!?/|]+)|(?P<end>[.!?]+|\n\s*\n)')
+_punctuationPattern = re.compile(r'\W+')
+
+
+def tokenize(text, first_sentence=0, offset=0):
+    """
+    Parameters
+    ----------
+    text : str
+        text to tokenize
+    first_sentence : int, optional
+        sentence id given to the first sentence
+    offset : int, optional
+        added to character offsets, when text is a part of a longer text
+
+    Returns
+    -------
+    generator of (word, sentence, start, end) tuples
+        word: lowercase word without punctuation
+        sentence: sentence id, counting sentences with at least one word, from first_sentence
+        start, end: character offsets of the word in text as written (text[start:end]),
+                    including punctuation attached to it
+
+    Examples
+    --------
+    list(tokenize("Ordet kommer af smør og brød. Oprindelig"))
+    [('ordet', 0, 0, 5), ..., ('brød', 0, 24, 28), ('oprindelig', 1, 30, 40)]
+    """
+
+    return _tokenize(text, [first_sentence, False], offset)
+
+
+def tokenize_stream(chunks, first_sentence=0):
+    """
+    Parameters
+    ----------
+    chunks : iterable of str
+        consecutive parts of one text: an open file (read line by line), 
+        read_chunks(filename), sys.stdin, a list or a generator of strings
+    first_sentence : int, optional
+        sentence id given to the first sentence
+
+    Returns
+    -------
+    generator of (word, sentence, start, end) tuples, as tokenize() on the joined text.
+    Words and empty lines cut by chunk boundaries are kept whole: the unfinished end 
+    of each chunk is carried over to the next one.
+    """
+
+    state = [first_sentence, False]
+    carry = ''
+    offset = 0
+
+    for chunk in chunks:
+        text = carry + chunk
+        cut = _unfinished_start(text)
+        yield from _tokenize(text[:cut], state, offset)
+        carry = text[cut:]
+        offset += cut
+
+    yield from _tokenize(carry, state, offset)
+
+
+def read_chunks(filename, chunk_size=1024*1024):
+    """
+    Parameters
+    ----------
+    filename : str ('filename.txt')
+    chunk_size : int, optional
+        number of characters read at a time
+
+    Returns
+    -------
+    generator of consecutive parts of the file, for tokenize_stream()
+    """
+
+    with open(filename, 'r', encoding='utf-8') as file_object:
+        for chunk in iter(lambda: file_object.read(chunk_size), ''):
+            yield chunk
+
+
+def _unfinished_start(text):
+    """
+    Start of the end of a text part that may continue in the next part: 
+    a word, or whitespace (possibly the start of an empty line).
+    """
+
+    cut = len(text)
+    if cut == 0:
+        return cut
+
+    trailingSpace = text[-1].isspace()
+    while cut > 0 and text[cut - 1].isspace() == trailingSpace and (trailingSpace or text[cut - 1] not in '.!?/|'):
+        cut -= 1
+
+    return cut
+
+
+def _tokenize(text, state, offset):
+    """
+    Tokenize text; state is [current sentence id, current sentence has words],
+    updated in place so that tokenizing can continue with the next part of a text.
+    """
+
+    for match in _tokenPattern.finditer(text):
+        if match.lastgroup == 'end':
+            if state[1]:
+                state[0] += 1
+                state[1] = False
+            continue
+
+        word = _punctuationPattern.sub('', match.group()).lower()
+        if word == '':
+            continue
+
+        state[1] = True
+        yield word, state[0], match.start() + offset, match.end() + offset
+
+
+def words(text):
+    """
+    Parameters
+    ----------
+    text : str
+
+    Returns
+    -------
+    list of lowercase words without punctuation, in order of the text
+    """
+
+    return [word for word, _, _, _ in tokenize(text)]